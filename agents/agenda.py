@@ -1,4 +1,5 @@
-from langchain.tools import Tool
+from agents.registro import atributo_preguicoso
+
 
 def adicionar_evento(query: str):
     return f'📅 O evento "{query}" foi adicionado à agenda.'
@@ -6,7 +7,6 @@ def adicionar_evento(query: str):
 def listar_eventos(query: str):
     return "📆 Aqui estão seus próximos eventos: ... (exemplo fictício)"
 
-agente_agenda = [
-    Tool(name="Gerenciador de Agenda", func=adicionar_evento, description="Adiciona eventos à sua agenda."),
-    Tool(name="Consultor de Agenda", func=listar_eventos, description="Lista seus compromissos.")
-]
+# As ferramentas deste agente são declaradas em agents/registro.py;
+# agente_agenda cria os Tool do LangChain apenas quando é acessado.
+__getattr__ = atributo_preguicoso("agenda")
@@ -0,0 +1,240 @@
+import calendar
+from datetime import date, datetime, timedelta
+import numpy as np
+from agents import consultas
+from agents.financeiro import determinar_intervalo
+
+# Análises de gastos com NumPy.
+#
+# A série diária de cada categoria e sub-categoria (do consolidado_diario) é lida uma vez
+# e montada em uma matriz séries x dias. Todas as contas são feitas sobre essa matriz,
+# sem laços por linha: maiores gastos do período e quanto estão acima do habitual, médias
+# móveis de 7 e 30 dias, projeção do gasto até o fim do mês contra os orçamentos e dias
+# fora do padrão (z-score contra a média e o desvio do mesmo dia da semana no histórico).
+#
+# O histórico usado como referência são os HISTORICO_DIAS dias anteriores ao período
+# analisado. A precisão é de um dia: o período começa no dia seguinte a
+# determinar_intervalo(periodo), como nos relatórios.
+
+HISTORICO_DIAS = 365
+TOP_N = 5
+LIMIAR_ANOMALIA = 3.0
+# Dias mínimos de histórico para calcular a referência de anomalias
+MINIMO_HISTORICO = 28
+# Desvio mínimo na referência de anomalias, como fração do gasto diário médio da série
+PISO_DESVIO = 0.1
+
+
+class Analise:
+    def __init__(self, periodo: str, desde, inicio, hoje, linhas: list, orcamentos: list):
+        self.periodo = periodo
+        self.hoje = hoje
+        self.dias = np.arange(np.datetime64(desde, "D"), np.datetime64(hoje, "D") + 1)
+        # Índice da primeira coluna do período analisado (as anteriores são o histórico)
+        self.corte = len(self.dias) - (hoje - inicio).days
+
+        if linhas:
+            dias, categorias, sub_categorias, totais = zip(*linhas)
+            # Cada série é identificada pelo par (categoria, sub_categoria) codificado em um inteiro
+            nomes_categorias, codigos_categorias = np.unique(np.array(categorias, dtype=str), return_inverse=True)
+            nomes_subs, codigos_subs = np.unique(np.array(sub_categorias, dtype=str), return_inverse=True)
+            codigos, indices = np.unique(codigos_categorias * len(nomes_subs) + codigos_subs, return_inverse=True)
+            self.series = np.stack([nomes_categorias[codigos // len(nomes_subs)], nomes_subs[codigos % len(nomes_subs)]], axis=1)
+            # date.toordinal via map é bem mais rápido que converter datas para datetime64
+            colunas = np.fromiter(map(date.toordinal, dias), dtype=np.int64, count=len(dias)) - desde.toordinal()
+            # Lançamentos com data futura ficam fora da análise
+            validas = (colunas >= 0) & (colunas < len(self.dias))
+            self.matriz = np.zeros((len(self.series), len(self.dias)))
+            self.matriz[indices.ravel()[validas], colunas[validas]] = np.array(totais, dtype=float)[validas]
+        else:
+            self.series = np.empty((0, 2), dtype=str)
+            self.matriz = np.zeros((0, len(self.dias)))
+
+        # O histórico começa no primeiro dia com algum gasto, para não contar como zero
+        # os dias anteriores ao início do uso
+        com_gasto = self.matriz[:, :self.corte].any(axis=0)
+        self.primeiro = int(np.argmax(com_gasto)) if com_gasto.any() else self.corte
+        self.orcamentos = orcamentos
+
+    @property
+    def historico(self) -> np.ndarray:
+        return self.matriz[:, self.primeiro:self.corte]
+
+    @property
+    def recente(self) -> np.ndarray:
+        return self.matriz[:, self.corte:]
+
+    def nome(self, indice: int) -> str:
+        categoria, sub_categoria = self.series[indice]
+        return f"{categoria} - {sub_categoria}" if sub_categoria else categoria
+
+    # Média móvel de cada série (janela em dias), calculada com soma acumulada
+    def media_movel(self, janela: int) -> np.ndarray:
+        acumulado = np.cumsum(np.pad(self.matriz, ((0, 0), (1, 0))), axis=1)
+        soma = acumulado[:, janela:] - acumulado[:, :-janela]
+        return np.concatenate([np.full((len(self.series), janela - 1), np.nan), soma / janela], axis=1)
+
+    # Total do período, média diária do histórico e excesso do período sobre o habitual
+    def totais(self) -> tuple:
+        total = self.recente.sum(axis=1)
+        media_historica = self.historico.mean(axis=1) if self.historico.shape[1] else np.zeros(len(self.series))
+        esperado = media_historica * self.recente.shape[1]
+        return total, esperado, np.maximum(total - esperado, 0)
+
+    # Índices das n séries com maior valor, do maior para o menor (ignorando zeros)
+    @staticmethod
+    def maiores(valores: np.ndarray, n: int) -> np.ndarray:
+        ordem = np.argsort(-valores, kind="stable")[:n]
+        return ordem[valores[ordem] > 0]
+
+    # Projeção do gasto de cada série no fim do mês: gasto do mês até hoje mais a média
+    # diária do período analisado vezes os dias que faltam.
+    def projecao_mes(self) -> tuple:
+        primeiro_dia = np.datetime64(self.hoje.replace(day=1), "D")
+        no_mes = self.dias >= primeiro_dia
+        gasto_mes = self.matriz[:, no_mes].sum(axis=1)
+        dias_restantes = calendar.monthrange(self.hoje.year, self.hoje.month)[1] - self.hoje.day
+        return gasto_mes, gasto_mes + self.recente.mean(axis=1) * dias_restantes
+
+    # Orçamentos alinhados às séries: (índices das séries, limites) dos orçamentos com série
+    def limites(self) -> tuple:
+        if not self.orcamentos or not len(self.series):
+            return np.array([], dtype=int), np.array([])
+        categorias, sub_categorias, limites = zip(*self.orcamentos)
+        chaves_series = np.char.add(np.char.add(self.series[:, 0], "\x1f"), self.series[:, 1])
+        chaves_orcamentos = np.char.add(np.char.add(np.array(categorias, dtype=str), "\x1f"), np.array(sub_categorias, dtype=str))
+        ordem = np.argsort(chaves_series)
+        posicoes = np.searchsorted(chaves_series, chaves_orcamentos, sorter=ordem)
+        posicoes = np.minimum(posicoes, len(ordem) - 1)
+        encontrados = chaves_series[ordem[posicoes]] == chaves_orcamentos
+        return ordem[posicoes[encontrados]], np.array(limites, dtype=float)[encontrados]
+
+    # z-score de cada dia do período contra a média e o desvio do mesmo dia da semana no
+    # histórico. O desvio tem um piso de PISO_DESVIO do gasto diário médio da série, para
+    # que um dia da semana sem variação (ex.: nunca houve gasto) não esconda um gasto
+    # novo; sem nenhum gasto no histórico, qualquer gasto acima da média tem z infinito.
+    # Retorna (z, esperado) com o formato de self.recente, ou None sem histórico suficiente.
+    def z_sazonal(self):
+        if self.historico.shape[1] < MINIMO_HISTORICO:
+            return None
+        dia_semana = (self.dias.astype(int) + 3) % 7  # 1970-01-01 foi uma quinta-feira
+        # Matriz dias x 7 indicando o dia da semana de cada dia do histórico
+        por_dia_semana = np.eye(7)[dia_semana[self.primeiro:self.corte]]
+        contagem = por_dia_semana.sum(axis=0)
+        media = self.historico @ por_dia_semana / contagem
+        desvio = np.sqrt(np.maximum((self.historico ** 2) @ por_dia_semana / contagem - media ** 2, 0))
+        desvio = np.maximum(desvio, PISO_DESVIO * self.historico.mean(axis=1, keepdims=True))
+        media_recente = media[:, dia_semana[self.corte:]]
+        desvio_recente = desvio[:, dia_semana[self.corte:]]
+        acima = self.recente > media_recente
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(desvio_recente > 0, (self.recente - media_recente) / desvio_recente,
+                         np.where(acima, np.inf, 0.0))
+        return z, media_recente
+
+
+# Lê a série diária (uma consulta) e os orçamentos vigentes e monta a análise do período
+def analisar(periodo: str = "mensal", historico_dias: int = HISTORICO_DIAS) -> tuple:
+    try:
+        inicio = determinar_intervalo(periodo)
+    except ValueError as e:
+        return str(e), None
+    hoje = datetime.now().date()
+    desde = inicio.date() + timedelta(days=1) - timedelta(days=historico_dias)
+
+    erro, linhas = consultas.serie_diaria_gastos(desde)
+    if erro:
+        return erro, None
+    erro, orcamentos = consultas.orcamentos_vigentes(hoje)
+    if erro:
+        return erro, None
+    return None, Analise(periodo, desde, inicio.date(), hoje, linhas, orcamentos)
+
+
+# Lista as categorias com maior gasto no período e quanto cada uma está acima do habitual.
+def sugerir_reducoes(periodo: str = "mensal", n: int = TOP_N) -> str:
+    erro, analise = analisar(periodo)
+    if erro:
+        return erro
+    total, esperado, excesso = analise.totais()
+    indices = analise.maiores(excesso, n)
+    if not len(indices):
+        indices = analise.maiores(total, n)
+        if not len(indices):
+            return "Nenhum gasto registrado no período para sugerir reduções."
+        return "\n".join(["Nenhuma categoria está acima do habitual. Maiores gastos do período:"]
+                         + [f"{analise.nome(i)}: {total[i]:.2f}" for i in indices])
+    linhas = [f"Categorias acima do habitual no período {analise.periodo}:"]
+    for i in indices:
+        linhas.append(f"{analise.nome(i)}: gastou {total[i]:.2f}, o habitual seria {esperado[i]:.2f}. "
+                      f"Reduzir {excesso[i]:.2f} volta ao padrão.")
+    return "\n".join(linhas)
+
+
+# Mostra as médias móveis de 7 e 30 dias das categorias com maior gasto no período e se
+# o gasto está subindo ou caindo (média dos últimos 7 dias contra os 7 anteriores).
+def tendencias_gastos(periodo: str = "mensal", n: int = TOP_N) -> str:
+    erro, analise = analisar(periodo)
+    if erro:
+        return erro
+    total, _, _ = analise.totais()
+    indices = analise.maiores(total, n)
+    if not len(indices):
+        return "Nenhum gasto registrado no período."
+    media_7, media_30 = analise.media_movel(7), analise.media_movel(30)
+    variacao = np.divide(media_7[:, -1] - media_7[:, -8], media_7[:, -8],
+                         out=np.full(len(total), np.nan), where=media_7[:, -8] > 0) * 100
+    linhas = [f"Tendência dos maiores gastos (período {analise.periodo}):"]
+    for i in indices:
+        tendencia = "sem base de comparação" if np.isnan(variacao[i]) else f"{variacao[i]:+.0f}% na última semana"
+        linhas.append(f"{analise.nome(i)}: total {total[i]:.2f}, média de 7 dias {media_7[i, -1]:.2f}/dia, "
+                      f"de 30 dias {media_30[i, -1]:.2f}/dia ({tendencia}).")
+    return "\n".join(linhas)
+
+
+# Projeta o gasto de cada categoria com orçamento até o fim do mês, no ritmo do período
+# informado, e aponta as que devem ultrapassar o limite.
+def projetar_orcamentos(periodo: str = "mensal", n: int = 10) -> str:
+    erro, analise = analisar(periodo)
+    if erro:
+        return erro
+    indices, limites = analise.limites()
+    if not len(indices):
+        return "Nenhum orçamento vigente com gastos registrados."
+    gasto_mes, projecao = analise.projecao_mes()
+    excesso = projecao[indices] - limites
+    estouram = np.nonzero(excesso > 0)[0]
+    if not len(estouram):
+        return f"No ritmo do período {periodo}, nenhum orçamento deve ser ultrapassado até o fim do mês."
+    estouram = estouram[np.argsort(-excesso[estouram])]
+    linhas = [f"No ritmo do período {periodo}, estes orçamentos devem ser ultrapassados até o fim do mês:"]
+    for j in estouram[:n]:
+        i = indices[j]
+        linhas.append(f"{analise.nome(i)}: gasto no mês {gasto_mes[i]:.2f}, projeção {projecao[i]:.2f}, "
+                      f"limite {limites[j]:.2f} (excesso previsto {excesso[j]:.2f}).")
+    if len(estouram) > n:
+        linhas.append(f"E mais {len(estouram) - n} orçamentos, com excesso previsto total de {excesso[estouram[n:]].sum():.2f}.")
+    return "\n".join(linhas)
+
+
+# Aponta os dias do período com gasto muito acima do habitual para a categoria naquele dia
+# da semana (z-score acima de LIMIAR_ANOMALIA).
+def detectar_anomalias(periodo: str = "mensal", n: int = 10) -> str:
+    erro, analise = analisar(periodo)
+    if erro:
+        return erro
+    resultado = analise.z_sazonal()
+    if resultado is None:
+        return "Histórico insuficiente para detectar gastos fora do padrão."
+    z, esperado = resultado
+    series, dias = np.nonzero((z > LIMIAR_ANOMALIA) & (analise.recente > 0))
+    if not len(series):
+        return f"Nenhum gasto fora do padrão no período {periodo}."
+    ordem = np.argsort(-z[series, dias])[:n]
+    linhas = [f"Gastos fora do padrão no período {periodo}:"]
+    for i, d in zip(series[ordem], dias[ordem]):
+        dia = analise.dias[analise.corte + d].astype(datetime).strftime("%d/%m/%Y")
+        referencia = f"z={z[i, d]:.1f}" if np.isfinite(z[i, d]) else "sem gastos no histórico"
+        linhas.append(f"{dia} em {analise.nome(i)}: {analise.recente[i, d]:.2f} "
+                      f"(habitual {esperado[i, d]:.2f}, {referencia}).")
+    return "\n".join(linhas)
@@ -0,0 +1,333 @@
+import os
+import pickle
+import threading
+import time
+import hashlib
+import inspect
+from collections import OrderedDict
+from datetime import datetime, date
+from functools import wraps
+
+# Cache de leitura das consultas financeiras.
+#
+# As consultas de agents/consultas.py são decoradas com @em_cache. A chave é o nome da
+# função mais os argumentos normalizados; datas de início de período (que dependem de
+# datetime.now()) são arredondadas para baldes de CACHE_BALDE_SEGUNDOS, então chamadas
+# repetidas dentro do mesmo balde reaproveitam o resultado.
+#
+# Cada entrada guarda de quais lançamentos depende: pares (tipo, categoria), com "*"
+# quando a consulta abrange todas as categorias, e a data de início do período. As
+# funções de escrita chamam invalidar(tipo, categorias, desde) e só as entradas
+# daquele tipo, daquelas categorias e cujo período inclui a data escrita são removidas.
+#
+# Para que uma consulta que começou antes de uma escrita não guarde o resultado antigo
+# depois da invalidação, cada dependência tem um contador de geração, incrementado a
+# cada invalidação. A geração é lida antes de executar a consulta, e o resultado só é
+# guardado se ela não mudou até o momento de gravar.
+
+CACHE_ATIVO = os.getenv("CACHE_ATIVO", "1").lower() not in ("0", "false", "nao", "não")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_TAMANHO = int(os.getenv("CACHE_TAMANHO", "512"))
+CACHE_BALDE_SEGUNDOS = int(os.getenv("CACHE_BALDE_SEGUNDOS", "60"))
+
+TODAS = "*"
+# Contadores de geração incrementados por invalidações de todas as categorias de um tipo
+# e por limpar()
+QUALQUER = "**"
+_GERAL = (TODAS, QUALQUER)
+
+_contadores = {"acertos": 0, "falhas": 0, "invalidacoes": 0}
+_contadores_lock = threading.Lock()
+
+
+def _contar(nome: str, quantidade: int = 1):
+    with _contadores_lock:
+        _contadores[nome] += quantidade
+
+
+# Indica se uma entrada com essas dependências é afetada por uma escrita
+def _afetada(etiquetas: set, inicio: datetime, tipo: str, categorias, desde: datetime) -> bool:
+    if desde is not None and inicio is not None and desde < inicio:
+        return False
+    for tipo_entrada, categoria in etiquetas:
+        if tipo_entrada != tipo:
+            continue
+        if categorias is None or categoria == TODAS or categoria in categorias:
+            return True
+    return False
+
+
+# Contadores de geração que uma entrada com essas dependências lê
+def _chaves_geracao(etiquetas: set) -> set:
+    chaves = {_GERAL}
+    for tipo, categoria in etiquetas:
+        chaves.add((tipo, QUALQUER))
+        chaves.add((tipo, categoria))
+    return chaves
+
+
+# Contadores de geração incrementados por uma invalidação
+def _chaves_invalidadas(tipo: str, categorias) -> set:
+    if categorias is None:
+        return {(tipo, QUALQUER)}
+    return {(tipo, categoria) for categoria in categorias} | {(tipo, TODAS)}
+
+
+# Cache em memória do processo: LRU com TTL e tamanho máximo.
+class CacheMemoria:
+    def __init__(self, tamanho_maximo: int = CACHE_TAMANHO, ttl: float = CACHE_TTL):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._geracoes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str) -> tuple:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return False, None
+            valor, expira_em, _, _ = entrada
+            if expira_em < time.monotonic():
+                del self._entradas[chave]
+                return False, None
+            self._entradas.move_to_end(chave)
+            return True, valor
+
+    def geracao(self, etiquetas: set) -> int:
+        with self._lock:
+            return sum(self._geracoes.get(chave, 0) for chave in _chaves_geracao(etiquetas))
+
+    # Com geracao, só guarda se nenhuma invalidação das dependências ocorreu desde então
+    def definir(self, chave: str, valor, etiquetas: set, inicio: datetime, geracao: int = None):
+        with self._lock:
+            if geracao is not None and geracao != sum(self._geracoes.get(dependencia, 0)
+                                                      for dependencia in _chaves_geracao(etiquetas)):
+                return
+            self._entradas[chave] = (valor, time.monotonic() + self.ttl, etiquetas, inicio)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, tipo: str, categorias=None, desde: datetime = None) -> int:
+        with self._lock:
+            for chave in _chaves_invalidadas(tipo, categorias):
+                self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+            removidas = [chave for chave, (_, _, etiquetas, inicio) in self._entradas.items()
+                         if _afetada(etiquetas, inicio, tipo, categorias, desde)]
+            for chave in removidas:
+                del self._entradas[chave]
+        return len(removidas)
+
+    def limpar(self):
+        with self._lock:
+            self._geracoes[_GERAL] = self._geracoes.get(_GERAL, 0) + 1
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+# Cache compartilhado entre processos via Redis (pip install redis).
+# Cada dependência (tipo, categoria) é um conjunto Redis com as chaves que dependem dela
+# e um contador de geração; a gravação usa WATCH nos contadores.
+class CacheRedis:
+    def __init__(self, url: str = None, ttl: float = CACHE_TTL, prefixo: str = "brainzap:cache"):
+        import redis
+
+        self.redis = redis.Redis.from_url(url or os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    def _chave(self, chave: str) -> str:
+        return f"{self.prefixo}:valor:{hashlib.sha1(chave.encode()).hexdigest()}"
+
+    def _etiqueta(self, tipo: str, categoria: str) -> str:
+        return f"{self.prefixo}:dep:{tipo}:{categoria}"
+
+    def _geracao(self, dependencia: tuple) -> str:
+        return f"{self.prefixo}:geracao:{dependencia[0]}:{dependencia[1]}"
+
+    def _somar_geracoes(self, cliente, chaves: list) -> int:
+        return sum(int(valor or 0) for valor in cliente.mget(chaves))
+
+    def geracao(self, etiquetas: set) -> int:
+        return self._somar_geracoes(self.redis, [self._geracao(d) for d in _chaves_geracao(etiquetas)])
+
+    def obter(self, chave: str) -> tuple:
+        dados = self.redis.get(self._chave(chave))
+        if dados is None:
+            return False, None
+        valor, _ = pickle.loads(dados)
+        return True, valor
+
+    def definir(self, chave: str, valor, etiquetas: set, inicio: datetime, geracao: int = None):
+        from redis import WatchError
+
+        chave_redis = self._chave(chave)
+        geracoes = [self._geracao(dependencia) for dependencia in _chaves_geracao(etiquetas)]
+        with self.redis.pipeline() as pipe:
+            try:
+                if geracao is not None:
+                    pipe.watch(*geracoes)
+                    if self._somar_geracoes(pipe, geracoes) != geracao:
+                        return
+                    pipe.multi()
+                pipe.set(chave_redis, pickle.dumps((valor, inicio)), ex=max(1, int(self.ttl)))
+                for tipo, categoria in etiquetas:
+                    pipe.sadd(self._etiqueta(tipo, categoria), chave_redis)
+                    pipe.expire(self._etiqueta(tipo, categoria), max(1, int(self.ttl)))
+                pipe.execute()
+            except WatchError:
+                # Uma invalidação ocorreu entre a leitura da geração e a gravação
+                return
+
+    def invalidar(self, tipo: str, categorias=None, desde: datetime = None) -> int:
+        with self.redis.pipeline() as pipe:
+            for dependencia in _chaves_invalidadas(tipo, categorias):
+                pipe.incr(self._geracao(dependencia))
+            pipe.execute()
+        if categorias is None:
+            conjuntos = list(self.redis.scan_iter(match=self._etiqueta(tipo, "*")))
+        else:
+            conjuntos = [self._etiqueta(tipo, categoria) for categoria in set(categorias) | {TODAS}]
+        chaves = list(self.redis.sunion(conjuntos)) if conjuntos else []
+        if not chaves:
+            return 0
+        removidas = []
+        for chave, dados in zip(chaves, self.redis.mget(chaves)):
+            if dados is None:
+                continue
+            _, inicio = pickle.loads(dados)
+            if desde is None or inicio is None or desde >= inicio:
+                removidas.append(chave)
+        if removidas:
+            self.redis.delete(*removidas)
+        return len(removidas)
+
+    def limpar(self):
+        self.redis.incr(self._geracao(_GERAL))
+        chaves = list(self.redis.scan_iter(match=f"{self.prefixo}:valor:*"))
+        chaves += self.redis.scan_iter(match=f"{self.prefixo}:dep:*")
+        if chaves:
+            self.redis.delete(*chaves)
+
+
+def _criar_backend():
+    if os.getenv("CACHE_BACKEND", "memoria").lower() == "redis":
+        return CacheRedis()
+    return CacheMemoria()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def obter_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _criar_backend()
+    return _backend
+
+
+# Troca o backend do cache (ex.: um CacheRedis compartilhado entre workers).
+def configurar_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _balde(momento: datetime) -> datetime:
+    segundos = int(momento.timestamp()) // CACHE_BALDE_SEGUNDOS * CACHE_BALDE_SEGUNDOS
+    return datetime.fromtimestamp(segundos)
+
+
+# Datas comparadas por invalidar: datetime sem fuso, no horário local. Datas com fuso são
+# convertidas para o horário local e date vira o início do dia.
+def _momento(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        return valor.astimezone().replace(tzinfo=None) if valor.tzinfo is not None else valor
+    if isinstance(valor, date):
+        return datetime.combine(valor, datetime.min.time())
+    return valor
+
+
+def _normalizar(valor):
+    if isinstance(valor, datetime):
+        return _balde(valor).isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, str):
+        return valor.strip()
+    if isinstance(valor, dict):
+        return tuple(sorted((str(chave), _normalizar(item)) for chave, item in valor.items()))
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        itens = [_normalizar(item) for item in valor]
+        return tuple(sorted(itens, key=repr) if isinstance(valor, (set, frozenset)) else itens)
+    return valor
+
+
+# Decora uma consulta que retorna (erro, resultado). Só resultados sem erro são guardados.
+# dependencias recebe os argumentos da chamada (dicionário nome -> valor) e retorna
+# (etiquetas, inicio): os pares (tipo, categoria) lidos e a data de início do período.
+def em_cache(dependencias):
+    def decorador(funcao):
+        assinatura = inspect.signature(funcao)
+
+        @wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if not CACHE_ATIVO:
+                return funcao(*args, **kwargs)
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            chave = repr((funcao.__module__, funcao.__qualname__, _normalizar(argumentos.arguments)))
+
+            backend = obter_backend()
+            achou, valor = backend.obter(chave)
+            if achou:
+                _contar("acertos")
+                return valor
+            _contar("falhas")
+
+            etiquetas, inicio = dependencias(argumentos.arguments)
+            etiquetas, inicio = set(etiquetas), _momento(inicio)
+            geracao = backend.geracao(etiquetas)
+            valor = funcao(*args, **kwargs)
+            if valor[0] is None:
+                backend.definir(chave, valor, etiquetas, inicio, geracao)
+            return valor
+
+        return envoltorio
+
+    return decorador
+
+
+# Remove do cache as consultas afetadas por uma escrita.
+# tipo: "gasto", "receita" ou "orcamento"; categorias: categorias escritas (None = todas);
+# desde: data mais antiga escrita (None = qualquer período).
+def invalidar(tipo: str, categorias=None, desde: datetime = None) -> int:
+    if isinstance(categorias, str):
+        categorias = {categorias}
+    removidas = obter_backend().invalidar(tipo, categorias, _momento(desde))
+    _contar("invalidacoes", removidas)
+    return removidas
+
+
+def limpar():
+    obter_backend().limpar()
+
+
+# Contadores de acertos, falhas e entradas invalidadas desde o início do processo.
+def estatisticas() -> dict:
+    with _contadores_lock:
+        resultado = dict(_contadores)
+    consultas = resultado["acertos"] + resultado["falhas"]
+    resultado["taxa_acerto"] = resultado["acertos"] / consultas if consultas else 0.0
+    backend = obter_backend()
+    if isinstance(backend, CacheMemoria):
+        resultado["entradas"] = len(backend)
+    return resultado
@@ -0,0 +1,143 @@
+import argparse
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from config.settings import executar_query, executar_lote, transacao
+from agents import cache
+from agents.extratos import normalizar_data
+
+# Consolidado diário de gastos e receitas.
+# A tabela consolidado_diario guarda, por dia, tipo ("gasto" ou "receita"), categoria e
+# sub-categoria, o total e a quantidade de lançamentos. Ela é atualizada de forma
+# incremental pelas funções de escrita de agents/financeiro.py e lida pelos relatórios,
+# que assim somam algumas linhas por dia em vez de todos os lançamentos do período.
+
+TABELA = """
+    CREATE TABLE IF NOT EXISTS consolidado_diario (
+        dia DATE NOT NULL,
+        tipo VARCHAR(10) NOT NULL,
+        categoria VARCHAR(255) NOT NULL DEFAULT '',
+        sub_categoria VARCHAR(255) NOT NULL DEFAULT '',
+        total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, tipo, categoria, sub_categoria)
+    )
+"""
+
+ACUMULAR = """
+    INSERT INTO consolidado_diario (dia, tipo, categoria, sub_categoria, total, quantidade)
+    VALUES %s
+    ON CONFLICT (dia, tipo, categoria, sub_categoria) DO UPDATE
+    SET total = consolidado_diario.total + EXCLUDED.total,
+        quantidade = consolidado_diario.quantidade + EXCLUDED.quantidade
+"""
+
+# Tabela de origem de cada tipo de lançamento
+TABELAS = {"gasto": "gastos", "receita": "receitas"}
+
+
+def criar_tabela() -> str:
+    erro, _ = executar_query(TABELA)
+    return erro
+
+
+# Soma lançamentos recém-inseridos ao consolidado, na transação aberta em conn.
+# linhas: iterável de (data, categoria, sub_categoria, valor); data pode ser datetime, date
+# ou texto, e é reduzida ao dia como o DATE(data) da reconstrução. valor pode ser Decimal,
+# float ou int; a soma é feita em Decimal, como o NUMERIC do banco.
+def acumular(conn, tipo: str, linhas) -> str:
+    totais = defaultdict(lambda: [Decimal(0), 0])
+    try:
+        for data, categoria, sub_categoria, valor in linhas:
+            chave = (normalizar_data(data).date(), tipo, categoria or "", sub_categoria or "")
+            totais[chave][0] += Decimal(str(valor))
+            totais[chave][1] += 1
+    except ValueError as e:
+        return str(e)
+    except InvalidOperation:
+        return f"Valor inválido: '{valor}'."
+    erro, _ = executar_lote(ACUMULAR, [chave + tuple(soma) for chave, soma in totais.items()], conn=conn)
+    return erro
+
+
+# Recalcula o consolidado a partir das tabelas originais (todo ou a partir de um dia).
+def reconstruir_consolidado(desde: date = None) -> str:
+    filtro_dia = " WHERE dia >= %s" if desde else ""
+    filtro_data = " AND data >= %s" if desde else ""
+    params = (desde,) if desde else ()
+    try:
+        with transacao() as conn:
+            erro, _ = executar_query(TABELA, conn=conn)
+            if not erro:
+                # Bloqueia escritas concorrentes no consolidado até o fim da reconstrução
+                erro, _ = executar_query("LOCK TABLE consolidado_diario IN EXCLUSIVE MODE", conn=conn)
+            if not erro:
+                erro, _ = executar_query(f"DELETE FROM consolidado_diario{filtro_dia}", params, conn=conn)
+            for tipo, tabela in TABELAS.items():
+                if erro:
+                    break
+                erro, _ = executar_query(f"""
+                    INSERT INTO consolidado_diario (dia, tipo, categoria, sub_categoria, total, quantidade)
+                    SELECT DATE(data), %s, COALESCE(categoria, ''), COALESCE(sub_categoria, ''), SUM(valor), COUNT(*)
+                    FROM {tabela}
+                    WHERE data IS NOT NULL{filtro_data}
+                    GROUP BY 1, 2, 3, 4
+                """, (tipo,) + params, conn=conn)
+    except Exception as e:
+        return f"Erro ao reconstruir o consolidado: {e}"
+    if erro:
+        return erro
+    cache.limpar()
+    return f"Consolidado diário reconstruído{f' a partir de {desde}' if desde else ''}."
+
+
+# Compara o consolidado com as tabelas originais e lista as diferenças encontradas.
+# Os totais são comparados com duas casas, já que no SQLite as somas são float.
+def verificar_consolidado(desde: date = None) -> str:
+    filtro_dia = " AND dia >= %s" if desde else ""
+    filtro_data = " AND data >= %s" if desde else ""
+    params = (desde,) if desde else ()
+
+    esperado = {}
+    for tipo, tabela in TABELAS.items():
+        erro, result = executar_query(f"""
+            SELECT DATE(data), COALESCE(categoria, ''), COALESCE(sub_categoria, ''), SUM(valor), COUNT(*)
+            FROM {tabela}
+            WHERE data IS NOT NULL{filtro_data}
+            GROUP BY 1, 2, 3
+        """, params)
+        if erro:
+            return erro
+        for dia, categoria, sub_categoria, total, quantidade in result:
+            esperado[(str(dia), tipo, categoria, sub_categoria)] = (round(total, 2), quantidade)
+
+    erro, result = executar_query(f"""
+        SELECT dia, tipo, categoria, sub_categoria, total, quantidade
+        FROM consolidado_diario
+        WHERE quantidade <> 0{filtro_dia}
+    """, params)
+    if erro:
+        return erro
+    encontrado = {(str(dia), tipo, categoria, sub_categoria): (round(total, 2), quantidade)
+                  for dia, tipo, categoria, sub_categoria, total, quantidade in result}
+
+    diferencas = [
+        f"{' / '.join(chave)}: esperado {esperado.get(chave, (0, 0))}, consolidado {encontrado.get(chave, (0, 0))}"
+        for chave in sorted(esperado.keys() | encontrado.keys())
+        if esperado.get(chave) != encontrado.get(chave)
+    ]
+    if not diferencas:
+        return "Consolidado diário consistente com as tabelas de gastos e receitas."
+    return f"{len(diferencas)} diferenças no consolidado diário:\n" + "\n".join(diferencas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção do consolidado diário de gastos e receitas.")
+    parser.add_argument("comando", choices=["reconstruir", "verificar"])
+    parser.add_argument("--desde", type=date.fromisoformat, help="Dia inicial (AAAA-MM-DD). Padrão: todo o histórico.")
+    args = parser.parse_args()
+
+    if args.comando == "reconstruir":
+        print(reconstruir_consolidado(args.desde))
+    else:
+        print(verificar_consolidado(args.desde))
@@ -0,0 +1,229 @@
+from datetime import date, datetime, time, timedelta
+from config.settings import executar_query, iterar_query
+from agents.consolidacao import TABELAS
+from agents.cache import em_cache, TODAS
+
+# Consultas do subagente financeiro.
+# As agregadas leem o consolidado_diario (dias completos) mais os lançamentos originais do
+# primeiro dia de cada período, que pode estar só em parte dentro dele. Vários períodos,
+# gastos e receitas são calculados em uma única varredura com agregação condicional
+# (SUM ... FILTER), e a verificação de orçamentos cruza todos eles em um só comando.
+# Os resultados passam pelo cache de agents/cache.py, invalidado pelas escritas.
+# pagina_gastos e iterar_gastos leem os lançamentos individuais, paginados pela chave
+# (data, id) ou com um cursor do lado do servidor.
+
+
+# Monta a fonte comum das consultas: linhas do consolidado a partir do dia seguinte ao
+# início mais antigo e lançamentos originais apenas dos dias de início de cada período.
+# Colunas: fonte ('c' consolidado, 'o' original), dia, momento, tipo, categoria,
+# sub_categoria, total e quantidade.
+def _fonte(inicios: list, tipos: tuple, categoria: str = None, sub_categoria: str = None) -> tuple:
+    filtro_consolidado, filtro_original, params_filtro = "", "", ()
+    if categoria is not None:
+        filtro_consolidado += " AND categoria = %s"
+        filtro_original += " AND COALESCE(categoria, '') = %s"
+        params_filtro += (categoria,)
+    if sub_categoria is not None:
+        filtro_consolidado += " AND sub_categoria = %s"
+        filtro_original += " AND COALESCE(sub_categoria, '') = %s"
+        params_filtro += (sub_categoria,)
+
+    dias_inicio = sorted({inicio.date() for inicio in inicios})
+    janelas = " OR ".join(["(data >= %s AND data < %s)"] * len(inicios))
+    params_janelas = ()
+    for inicio in inicios:
+        params_janelas += (inicio, inicio.date() + timedelta(days=1))
+
+    partes = [f"""
+        SELECT 'c' AS fonte, dia, CAST(NULL AS TIMESTAMP) AS momento, tipo, categoria, sub_categoria, total, quantidade
+        FROM consolidado_diario
+        WHERE tipo IN ({', '.join(['%s'] * len(tipos))}) AND dia > %s{filtro_consolidado}
+    """]
+    params = tuple(tipos) + (dias_inicio[0],) + params_filtro
+    for tipo in tipos:
+        partes.append(f"""
+        SELECT 'o', CAST(NULL AS DATE), data, '{tipo}', COALESCE(categoria, ''), COALESCE(sub_categoria, ''), valor, 1
+        FROM {TABELAS[tipo]}
+        WHERE ({janelas}){filtro_original}
+        """)
+        params += params_janelas + params_filtro
+    return " UNION ALL ".join(partes), params
+
+
+# Condição (para FILTER ou JOIN) que seleciona as linhas da fonte dentro do período iniciado em inicio
+def _no_periodo(inicio: datetime) -> tuple:
+    return (
+        "((fonte = 'c' AND dia > %s) OR (fonte = 'o' AND momento >= %s AND momento < %s))",
+        (inicio.date(), inicio, inicio.date() + timedelta(days=1)),
+    )
+
+
+def _dependencias_totais(argumentos: dict) -> tuple:
+    categoria = argumentos["categoria"] if argumentos["categoria"] is not None else TODAS
+    return {(tipo, categoria) for tipo in argumentos["tipos"]}, min(argumentos["inicios"].values())
+
+
+def _dependencias_gastos(argumentos: dict) -> tuple:
+    return {("gasto", TODAS)}, argumentos["data_inicio"]
+
+
+def _dependencias_orcamentos(argumentos: dict) -> tuple:
+    categoria = argumentos["categoria"] if argumentos["categoria"] is not None else TODAS
+    return {("gasto", categoria), ("orcamento", categoria)}, argumentos["data_inicio"]
+
+
+# Calcula, em uma única consulta, o total e a quantidade de lançamentos de cada tipo
+# em cada período. inicios mapeia um rótulo (ex.: "mensal") para a data de início.
+# Retorna (erro, {rótulo: {"gasto": total, "quantidade_gasto": n, "receita": ..., ...}}).
+@em_cache(_dependencias_totais)
+def totais_por_periodo(inicios: dict, tipos: tuple = ("gasto", "receita"), categoria: str = None, sub_categoria: str = None) -> tuple:
+    rotulos = list(inicios)
+    fonte, params_fonte = _fonte([inicios[rotulo] for rotulo in rotulos], tipos, categoria, sub_categoria)
+
+    colunas, params_colunas = [], ()
+    for rotulo in rotulos:
+        condicao, params_condicao = _no_periodo(inicios[rotulo])
+        for tipo in tipos:
+            for agregado in ("total", "quantidade"):
+                colunas.append(f"SUM({agregado}) FILTER (WHERE tipo = %s AND {condicao})")
+                params_colunas += (tipo,) + params_condicao
+
+    query = f"SELECT {', '.join(colunas)} FROM ({fonte}) t"
+    erro, result = executar_query(query, params_colunas + params_fonte, preparar=True)
+    if erro:
+        return erro, None
+
+    valores = iter(result[0])
+    totais = {}
+    for rotulo in rotulos:
+        totais[rotulo] = {}
+        for tipo in tipos:
+            totais[rotulo][tipo] = next(valores) or 0
+            totais[rotulo][f"quantidade_{tipo}"] = next(valores) or 0
+    return None, totais
+
+
+# Soma os gastos de um período por categoria e sub-categoria, do maior para o menor.
+# depois_de=(total, categoria, sub_categoria) continua a lista a partir da última linha
+# de uma página anterior (paginação por chave, sem OFFSET). O total é arredondado em
+# centavos para que a comparação com o da página anterior seja exata também no SQLite,
+# onde as somas são float.
+# Retorna (erro, [(categoria, sub_categoria, total), ...]).
+@em_cache(_dependencias_gastos)
+def gastos_por_categoria(data_inicio: datetime, limite: int = None, depois_de: tuple = None) -> tuple:
+    fonte, params_fonte = _fonte([data_inicio], ("gasto",))
+    condicao, params_condicao = _no_periodo(data_inicio)
+    filtro, params_filtro = "", ()
+    if depois_de is not None:
+        total, categoria, sub_categoria = depois_de
+        filtro = ("HAVING ROUND(SUM(total), 2) < %s OR (ROUND(SUM(total), 2) = %s "
+                  "AND (categoria > %s OR (categoria = %s AND sub_categoria > %s)))")
+        params_filtro = (total, total, categoria, categoria, sub_categoria)
+    query = f"""
+        SELECT categoria, sub_categoria, ROUND(SUM(total), 2)
+        FROM ({fonte}) t
+        WHERE {condicao}
+        GROUP BY categoria, sub_categoria
+        {filtro}
+        ORDER BY ROUND(SUM(total), 2) DESC, categoria, sub_categoria
+    """
+    params = params_fonte + params_condicao + params_filtro
+    if limite is not None:
+        query += " LIMIT %s"
+        params += (limite,)
+    return executar_query(query, params, preparar=True)
+
+
+# Cruza todos os orçamentos com os gastos do período em um único comando, respeitando
+# data_inicio e data_fim de cada orçamento (no consolidado, com precisão de dia).
+# Retorna (erro, [(categoria, sub_categoria, limite, total_gasto), ...]), do maior excesso
+# para o menor. Com somente_excedidos=False traz também os orçamentos dentro do limite.
+@em_cache(_dependencias_orcamentos)
+def orcamentos_excedidos(data_inicio: datetime, categoria: str = None, sub_categoria: str = None, somente_excedidos: bool = True) -> tuple:
+    fonte, params_fonte = _fonte([data_inicio], ("gasto",), categoria, sub_categoria)
+    condicao, params_condicao = _no_periodo(data_inicio)
+
+    filtro, params_filtro = "", ()
+    if categoria is not None:
+        filtro += " AND o.categoria = %s"
+        params_filtro += (categoria,)
+    if sub_categoria is not None:
+        filtro += " AND COALESCE(o.sub_categoria, '') = %s"
+        params_filtro += (sub_categoria,)
+
+    query = f"""
+        SELECT o.categoria, COALESCE(o.sub_categoria, ''), o.limite, COALESCE(SUM(g.total), 0) AS gasto
+        FROM orcamentos o
+        LEFT JOIN (SELECT * FROM ({fonte}) t WHERE {condicao}) g
+            ON g.categoria = o.categoria
+            AND g.sub_categoria = COALESCE(o.sub_categoria, '')
+            AND (
+                (g.fonte = 'c' AND (o.data_inicio IS NULL OR g.dia >= DATE(o.data_inicio))
+                                AND (o.data_fim IS NULL OR g.dia <= DATE(o.data_fim)))
+                OR (g.fonte = 'o' AND (o.data_inicio IS NULL OR g.momento >= o.data_inicio)
+                                  AND (o.data_fim IS NULL OR g.momento <= o.data_fim))
+            )
+        WHERE 1 = 1{filtro}
+        GROUP BY o.id, o.categoria, o.sub_categoria, o.limite
+        {"HAVING COALESCE(SUM(g.total), 0) > o.limite" if somente_excedidos else ""}
+        ORDER BY COALESCE(SUM(g.total), 0) - o.limite DESC
+    """
+    return executar_query(query, params_fonte + params_condicao + params_filtro, preparar=True)
+
+
+def _dependencias_serie(argumentos: dict) -> tuple:
+    return {("gasto", TODAS)}, datetime.combine(argumentos["desde"], time())
+
+
+def _dependencias_orcamentos_vigentes(argumentos: dict) -> tuple:
+    return {("orcamento", TODAS)}, None
+
+
+# Série diária dos gastos de cada categoria e sub-categoria a partir de desde (inclusive),
+# lida só do consolidado. Usada pelas análises de agents/analise.py.
+# Retorna (erro, [(dia, categoria, sub_categoria, total), ...]), com total em float.
+@em_cache(_dependencias_serie)
+def serie_diaria_gastos(desde: date) -> tuple:
+    query = """
+        SELECT dia, categoria, sub_categoria, CAST(total AS DOUBLE PRECISION)
+        FROM consolidado_diario
+        WHERE tipo = 'gasto' AND dia >= %s
+    """
+    return executar_query(query, (desde,), preparar=True)
+
+
+# Orçamentos em vigor no dia informado.
+# Retorna (erro, [(categoria, sub_categoria, limite), ...]), com limite em float.
+@em_cache(_dependencias_orcamentos_vigentes)
+def orcamentos_vigentes(dia: date) -> tuple:
+    query = """
+        SELECT categoria, COALESCE(sub_categoria, ''), CAST(limite AS DOUBLE PRECISION)
+        FROM orcamentos
+        WHERE (data_inicio IS NULL OR DATE(data_inicio) <= %s) AND (data_fim IS NULL OR DATE(data_fim) >= %s)
+    """
+    return executar_query(query, (dia, dia), preparar=True)
+
+
+def _gastos_da_categoria(categoria: str, sub_categoria: str, data_inicio: datetime, depois_de: tuple) -> tuple:
+    query = "SELECT data, id, valor FROM gastos WHERE categoria = %s AND sub_categoria = %s AND data >= %s"
+    params = (categoria, sub_categoria, data_inicio)
+    if depois_de is not None:
+        query += " AND (data < %s OR (data = %s AND id < %s))"
+        params += (depois_de[0], depois_de[0], depois_de[1])
+    return query + " ORDER BY data DESC, id DESC", params
+
+
+# Uma página dos gastos de uma categoria e sub-categoria, do mais recente para o mais
+# antigo, paginada pela chave (data, id): depois_de é a (data, id) da última linha da
+# página anterior. Usa o índice (categoria, sub_categoria, data) e lê só limite linhas.
+# Retorna (erro, [(data, id, valor), ...]).
+def pagina_gastos(categoria: str, sub_categoria: str, data_inicio: datetime, limite: int, depois_de: tuple = None) -> tuple:
+    query, params = _gastos_da_categoria(categoria, sub_categoria, data_inicio, depois_de)
+    return executar_query(query + " LIMIT %s", params + (limite,), preparar=True)
+
+
+# Percorre todos os gastos de uma categoria e sub-categoria no período com um cursor do
+# lado do servidor, sem carregar tudo na memória. Gera (data, id, valor).
+def iterar_gastos(categoria: str, sub_categoria: str, data_inicio: datetime, tamanho_lote: int = 1000):
+    query, params = _gastos_da_categoria(categoria, sub_categoria, data_inicio, None)
+    return iterar_query(query, params, tamanho_lote)
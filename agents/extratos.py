@@ -0,0 +1,208 @@
+import codecs
+import csv
+import html
+import os
+import re
+import unicodedata
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+
+# Leitura de extratos bancários em fluxo (CSV e OFX).
+# Os leitores são geradores: devolvem um lançamento por vez no formato aceito por
+# registrar_lancamentos_em_lote, sem carregar o arquivo inteiro na memória.
+# Linhas que não puderem ser interpretadas saem como {"linha": n, "erro": motivo}.
+
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d/%m/%y")
+
+# Nomes de coluna aceitos no CSV (sem acentos e em minúsculas)
+COLUNAS_CSV = {
+    "data": "data",
+    "valor": "valor",
+    "categoria": "categoria",
+    "sub_categoria": "sub_categoria",
+    "subcategoria": "sub_categoria",
+    "descricao": "descricao",
+    "historico": "descricao",
+    "tipo": "tipo",
+}
+
+_TAG_OFX = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+_MILHAR = re.compile(r"[-+]?\d{1,3}(?:\.\d{3})+")
+
+
+# Converte um valor em texto. Formato brasileiro: com vírgula ("1.234,56") ou com ponto
+# seguido de exatamente três dígitos ("1.500" é mil e quinhentos), o ponto separa o
+# milhar; nos demais casos ("50.5") é o separador decimal. O roteador usa a mesma regra.
+def converter_valor(texto: str) -> Decimal:
+    texto = texto.strip().replace("R$", "").replace(" ", "")
+    if "," in texto or _MILHAR.fullmatch(texto):
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: '{texto}'.")
+
+
+def converter_data(texto: str) -> datetime:
+    texto = texto.strip()
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: '{texto}'.")
+
+
+# Converte a data de um lançamento em datetime: aceita datetime, date e texto (ISO ou
+# um dos FORMATOS_DATA). Levanta ValueError para datas inválidas.
+def normalizar_data(data) -> datetime:
+    if isinstance(data, datetime):
+        return data
+    if isinstance(data, date):
+        return datetime.combine(data, time())
+    if isinstance(data, str):
+        try:
+            return datetime.fromisoformat(data.strip())
+        except ValueError:
+            return converter_data(data)
+    raise ValueError(f"Data inválida: '{data}'.")
+
+
+def _normalizar_coluna(nome: str) -> str:
+    nome = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return nome.strip().lower().replace("-", "_").replace(" ", "_")
+
+
+# Monta o lançamento a partir de um valor com sinal: negativo é gasto, positivo é receita
+def _lancamento(valor: Decimal, data: datetime, descricao: str, categoria: str, sub_categoria: str, tipo: str = None) -> dict:
+    if not tipo:
+        tipo = "gasto" if valor < 0 else "receita"
+    return {
+        "tipo": tipo,
+        "valor": abs(valor),
+        "categoria": categoria,
+        "sub_categoria": sub_categoria,
+        "descricao": descricao,
+        "data": data,
+    }
+
+
+# Encoding do extrato: UTF-8 (com ou sem BOM) se o arquivo inteiro for UTF-8 válido e,
+# senão, cp1252, o padrão dos extratos exportados pelos bancos brasileiros. Lê o arquivo
+# em blocos, sem carregá-lo na memória.
+def detectar_encoding(caminho: str, tamanho_bloco: int = 65536) -> str:
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    with open(caminho, "rb") as arquivo:
+        try:
+            while True:
+                bloco = arquivo.read(tamanho_bloco)
+                if not bloco:
+                    break
+                decodificador.decode(bloco)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "cp1252"
+    return "utf-8-sig"
+
+
+# Lê um CSV com cabeçalho. Colunas obrigatórias: data e valor.
+# Opcionais: categoria, sub_categoria, descricao e tipo ("gasto" ou "receita").
+# Sem encoding, usa detectar_encoding(); caracteres inválidos no encoding são um erro.
+def ler_csv(caminho: str, categoria_padrao: str = "Importado", encoding: str = None):
+    with open(caminho, newline="", encoding=encoding or detectar_encoding(caminho)) as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+        except csv.Error:
+            dialeto = csv.excel
+        leitor = csv.reader(arquivo, dialeto)
+        cabecalho = next(leitor, None)
+        if cabecalho is None:
+            return
+        colunas = [COLUNAS_CSV.get(_normalizar_coluna(nome)) for nome in cabecalho]
+        if "data" not in colunas or "valor" not in colunas:
+            raise ValueError("O CSV precisa das colunas 'data' e 'valor'.")
+
+        for numero, campos in enumerate(leitor, start=2):
+            if not any(campo.strip() for campo in campos):
+                continue
+            registro = {coluna: campo.strip() for coluna, campo in zip(colunas, campos) if coluna}
+            try:
+                lancamento = _lancamento(
+                    converter_valor(registro.get("valor", "")),
+                    converter_data(registro.get("data", "")),
+                    registro.get("descricao", ""),
+                    registro.get("categoria") or categoria_padrao,
+                    registro.get("sub_categoria", ""),
+                    registro.get("tipo", "").lower(),
+                )
+            except ValueError as e:
+                yield {"linha": numero, "erro": str(e)}
+                continue
+            lancamento["linha"] = numero
+            yield lancamento
+
+
+def _tags_ofx(arquivo, tamanho_bloco: int = 65536):
+    resto = ""
+    while True:
+        bloco = arquivo.read(tamanho_bloco)
+        if not bloco:
+            break
+        texto = resto + bloco
+        # Guarda o trecho após o último "<" para não cortar uma tag ao meio
+        corte = texto.rfind("<")
+        texto, resto = (texto[:corte], texto[corte:]) if corte > 0 else (texto, "")
+        yield from _extrair_tags(texto)
+    yield from _extrair_tags(resto)
+
+
+def _extrair_tags(texto: str):
+    for match in _TAG_OFX.finditer(texto):
+        yield match.group(1) == "/", match.group(2).upper(), html.unescape(match.group(3).strip())
+
+
+# Lê as transações (<STMTTRN>) de um arquivo OFX, aceitando o formato SGML (sem tags de fechamento).
+def ler_ofx(caminho: str, categoria_padrao: str = "Importado", encoding: str = None):
+    with open(caminho, encoding=encoding or detectar_encoding(caminho)) as arquivo:
+        transacao = None
+        numero = 0
+        for fechamento, tag, texto in _tags_ofx(arquivo):
+            if tag == "STMTTRN":
+                if not fechamento:
+                    transacao = {}
+                    numero += 1
+                    continue
+                if transacao is not None:
+                    yield _lancamento_ofx(transacao, numero, categoria_padrao)
+                transacao = None
+            elif transacao is not None and not fechamento and texto:
+                transacao[tag] = texto
+
+
+def _lancamento_ofx(transacao: dict, numero: int, categoria_padrao: str) -> dict:
+    try:
+        # DTPOSTED: AAAAMMDD[HHMMSS[.XXX]][[-3:BRT]]
+        digitos = re.match(r"\d*", transacao.get("DTPOSTED", "")).group(0)
+        if len(digitos) >= 14:
+            data = datetime.strptime(digitos[:14], "%Y%m%d%H%M%S")
+        else:
+            data = datetime.strptime(digitos[:8], "%Y%m%d")
+        valor = converter_valor(transacao.get("TRNAMT", ""))
+    except ValueError as e:
+        return {"linha": numero, "erro": str(e)}
+    descricao = transacao.get("MEMO") or transacao.get("NAME") or ""
+    lancamento = _lancamento(valor, data, descricao, categoria_padrao, "")
+    lancamento["linha"] = numero
+    return lancamento
+
+
+# Escolhe o leitor pela extensão do arquivo (.csv ou .ofx)
+def ler_extrato(caminho: str, categoria_padrao: str = "Importado", encoding: str = None):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".csv":
+        return ler_csv(caminho, categoria_padrao, encoding)
+    if extensao == ".ofx":
+        return ler_ofx(caminho, categoria_padrao, encoding)
+    raise ValueError("Formato de extrato não suportado. Use um arquivo .csv ou .ofx.")
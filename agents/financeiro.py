@@ -1,5 +1,13 @@
+import json
+import math
+import base64
 from datetime import datetime, timedelta
-from config.settings import executar_query
+from decimal import Decimal
+from itertools import islice
+from config.settings import executar_query, executar_lote, transacao
+from agents import cache, consolidacao, consultas
+from agents.extratos import normalizar_data
+from agents.registro import atributo_preguicoso
 
 def determinar_intervalo(periodo: str) -> datetime:
     hoje = datetime.now()
@@ -14,9 +22,27 @@ def determinar_intervalo(periodo: str) -> datetime:
     else:
         raise ValueError("Período inválido. Use 'semanal', 'quinzenal', 'mensal' ou 'trimestral'.")
 
-# Registra um novo gasto com valor, categoria, sub-categoria e descrição.
-def registrar_gasto(valor: float, categoria: str, sub_categoria: str = "", descricao: str = "", data: datetime = None) -> str:
-    # Validação dos dados
+# Linhas por página nas respostas de relatório e histórico enviadas ao LLM
+LIMITE_PAGINA = 20
+PREFIXO_CONTINUACAO = "continuar:"
+
+# Codifica a posição da última linha de uma página em um token de continuação
+def _continuacao(**posicao) -> str:
+    dados = json.dumps(posicao, default=str, separators=(",", ":"))
+    return PREFIXO_CONTINUACAO + base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+def _ler_continuacao(token: str, *campos) -> dict:
+    dados = token.strip()[len(PREFIXO_CONTINUACAO):]
+    try:
+        posicao = json.loads(base64.urlsafe_b64decode(dados + "=" * (-len(dados) % 4)))
+    except ValueError:
+        posicao = None
+    if not isinstance(posicao, dict) or any(campo not in posicao for campo in campos):
+        raise ValueError("Token de continuação inválido.")
+    return posicao
+
+# Valida os dados de um gasto. Retorna a mensagem de erro ou None se o gasto for válido.
+def validar_gasto(valor: float, categoria: str, descricao: str = "") -> str:
     if valor <= 0:
         return "O valor do gasto deve ser maior que zero."
     
@@ -25,15 +51,45 @@ def registrar_gasto(valor: float, categoria: str, sub_categoria: str = "", descr
     
     if descricao and len(descricao.strip()) > 500:
         return "A descrição do gasto é muito longa. O limite é 500 caracteres."
+    return None
+
+# Valida os dados de uma receita. Retorna a mensagem de erro ou None se a receita for válida.
+def validar_receita(valor: float) -> str:
+    if valor <= 0:
+        return "O valor da receita deve ser maior que zero."
+    return None
 
-    if data is None:
-        data = datetime.now()
+# Insere um lançamento e atualiza o consolidado diário na mesma transação.
+def _inserir_lancamento(query: str, params: tuple, tipo: str, data: datetime, categoria: str, sub_categoria: str, valor: float) -> str:
+    try:
+        with transacao() as conn:
+            erro, _ = executar_query(query, params, preparar=True, conn=conn)
+            if not erro:
+                erro = consolidacao.acumular(conn, tipo, [(data, categoria, sub_categoria, valor)])
+    except Exception as e:
+        print(f"Erro ao conectar ao banco de dados: {e}")
+        return "Erro ao conectar ao banco de dados."
+    if not erro:
+        cache.invalidar(tipo, categoria or "", data)
+    return erro
+
+# Registra um novo gasto com valor, categoria, sub-categoria e descrição.
+def registrar_gasto(valor: float, categoria: str, sub_categoria: str = "", descricao: str = "", data: datetime = None) -> str:
+    # Validação dos dados
+    erro = validar_gasto(valor, categoria, descricao)
+    if erro:
+        return erro
+
+    try:
+        data = normalizar_data(data or datetime.now())
+    except ValueError as e:
+        return str(e)
 
     query = """
         INSERT INTO gastos (valor, categoria, sub_categoria, descricao, data)
         VALUES (%s, %s, %s, %s, %s)
     """
-    erro, _ = executar_query(query, (valor, categoria, sub_categoria, descricao, data))
+    erro = _inserir_lancamento(query, (valor, categoria, sub_categoria, descricao, data), "gasto", data, categoria, sub_categoria, valor)
     if erro:
         return erro
     return f"Gasto de R${valor:.2f} registrado na categoria '{categoria}' e sub-categoria '{sub_categoria}' em {data}."
@@ -45,11 +101,10 @@ def resumo_gastos(periodo: str = "mensal") -> str:
     except ValueError as e:
         return str(e)
 
-    query = "SELECT COUNT(*), SUM(valor) FROM gastos WHERE data >= %s"
-    erro, result = executar_query(query, (data_inicio,))
+    erro, totais = consultas.totais_por_periodo({periodo: data_inicio}, tipos=("gasto",))
     if erro:
         return erro
-    total_gastos, valor_total = result[0]
+    total_gastos, valor_total = totais[periodo]["quantidade_gasto"], totais[periodo]["gasto"]
     return f"Total de gastos: {total_gastos}, Valor total gasto: R${valor_total:.2f} no período {periodo}."
 
 # Define um orçamento para uma categoria e sub-categoria.
@@ -64,9 +119,10 @@ def definir_orcamento(categoria: str, limite: float, sub_categoria: str = "", da
         VALUES (%s, %s, %s, %s, %s)
         ON CONFLICT (categoria, sub_categoria) DO UPDATE SET limite = EXCLUDED.limite, data_inicio = EXCLUDED.data_inicio, data_fim = EXCLUDED.data_fim
     """
-    erro, _ = executar_query(query, (categoria, sub_categoria, limite, data_inicio, data_fim))
+    erro, _ = executar_query(query, (categoria, sub_categoria, limite, data_inicio, data_fim), preparar=True)
     if erro:
         return erro
+    cache.invalidar("orcamento", categoria)
     return f"Orçamento de {limite} definido para a categoria '{categoria}' e sub-categoria '{sub_categoria}' de {data_inicio} a {data_fim}."
 
 # Analisa os gastos de uma categoria e sub-categoria em relação ao orçamento definido.
@@ -76,44 +132,53 @@ def analisar_gastos(categoria: str, sub_categoria: str = "", periodo: str = "men
     except ValueError as e:
         return str(e)
 
-    query_limite = "SELECT limite FROM orcamentos WHERE categoria = %s AND sub_categoria = %s"
-    erro, result = executar_query(query_limite, (categoria, sub_categoria))
+    erro, result = consultas.orcamentos_excedidos(data_inicio, categoria, sub_categoria, somente_excedidos=False)
     if erro:
         return erro
     if not result:
         return f"Nenhum orçamento definido para a categoria '{categoria}' e sub-categoria '{sub_categoria}'."
     
-    limite = result[0][0]
-    query_gastos = "SELECT SUM(valor) FROM gastos WHERE categoria = %s AND sub_categoria = %s AND data >= %s"
-    erro, result = executar_query(query_gastos, (categoria, sub_categoria, data_inicio))
-    if erro:
-        return erro
-    total_gastos = result[0][0] or 0
+    _, _, limite, total_gastos = result[0]
 
     if total_gastos > limite:
         return f"Você excedeu o orçamento de {limite} em '{categoria}' e sub-categoria '{sub_categoria}' no período {periodo}. Total gasto: {total_gastos}."
     return f"Você está dentro do orçamento de '{categoria}' e sub-categoria '{sub_categoria}' no período {periodo}. Total gasto: {total_gastos}, Limite: {limite}."
 
-# Gera um relatório com o total gasto em cada categoria e sub-categoria.
-def relatorio_gastos(periodo: str = "mensal") -> str:
+# Gera um relatório com o total gasto em cada categoria e sub-categoria, do maior para o menor.
+# Mostra até limite linhas; se houver mais, termina com o total do período e um token de
+# continuação, que pode ser passado no lugar do período para obter a próxima página.
+def relatorio_gastos(periodo: str = "mensal", limite: int = LIMITE_PAGINA, continuacao: str = None) -> str:
+    if continuacao is None and periodo.strip().startswith(PREFIXO_CONTINUACAO):
+        continuacao = periodo
+    depois_de = None
+    if continuacao:
+        try:
+            posicao = _ler_continuacao(continuacao, "periodo", "total", "categoria", "sub_categoria")
+            depois_de = (Decimal(posicao["total"]), posicao["categoria"], posicao["sub_categoria"])
+        except (ValueError, ArithmeticError):
+            return "Token de continuação inválido."
+        periodo = posicao["periodo"]
     try:
         data_inicio = determinar_intervalo(periodo)
     except ValueError as e:
         return str(e)
 
-    query = """
-        SELECT categoria, sub_categoria, SUM(valor)
-        FROM gastos
-        WHERE data >= %s
-        GROUP BY categoria, sub_categoria
-    """
-    erro, result = executar_query(query, (data_inicio,))
+    erro, result = consultas.gastos_por_categoria(data_inicio, limite=limite + 1, depois_de=depois_de)
     if erro:
         return erro
     if not result:
-        return "Nenhum gasto registrado para gerar o relatório."
-    
-    relatorio_formatado = "\n".join([f"{categoria} - {sub_categoria}: {valor}" for categoria, sub_categoria, valor in result])
+        return "Nenhum gasto registrado para gerar o relatório." if depois_de is None else "Não há mais categorias no relatório."
+
+    pagina = result[:limite]
+    relatorio_formatado = "\n".join([f"{categoria} - {sub_categoria}: {valor}" for categoria, sub_categoria, valor in pagina])
+    if len(result) > limite:
+        categoria, sub_categoria, valor = pagina[-1]
+        if depois_de is None:
+            erro, totais = consultas.totais_por_periodo({periodo: data_inicio}, ("gasto",))
+            if not erro:
+                relatorio_formatado += f"\nTotal do período {periodo}: {totais[periodo]['gasto']} em {totais[periodo]['quantidade_gasto']} gastos."
+        token = _continuacao(periodo=periodo, total=valor, categoria=categoria, sub_categoria=sub_categoria)
+        relatorio_formatado += f"\nHá mais categorias. Para ver a próxima página, use: {token}"
     return relatorio_formatado
 
 # Verifica se o total gasto em uma categoria e sub-categoria ultrapassou o limite definido.
@@ -122,13 +187,29 @@ def alerta_excesso_gasto(categoria: str, sub_categoria: str, total_gasto: float,
         return f"Atenção: Você ultrapassou o orçamento de {categoria} e sub-categoria {sub_categoria}!"
     return "Sem alertas."
 
+# Verifica todos os orçamentos de uma vez e lista os que foram ultrapassados no período.
+def verificar_orcamentos(periodo: str = "mensal") -> str:
+    try:
+        data_inicio = determinar_intervalo(periodo)
+    except ValueError as e:
+        return str(e)
+
+    erro, result = consultas.orcamentos_excedidos(data_inicio)
+    if erro:
+        return erro
+    if not result:
+        return f"Nenhum orçamento ultrapassado no período {periodo}."
+    return "\n".join([f"Atenção: '{categoria}' e sub-categoria '{sub_categoria}' ultrapassou o orçamento de {limite}. Total gasto: {total}." for categoria, sub_categoria, limite, total in result])
+
 # Registra uma nova receita com valor.
 def registrar_receita(valor: float, data: datetime = None) -> str:
-    if data is None:
-        data = datetime.now()
+    try:
+        data = normalizar_data(data or datetime.now())
+    except ValueError as e:
+        return str(e)
 
     query = "INSERT INTO receitas (valor, data) VALUES (%s, %s)"
-    erro, _ = executar_query(query, (valor, data))
+    erro = _inserir_lancamento(query, (valor, data), "receita", data, "", "", valor)
     if erro:
         return erro
     return f"Receita de {valor} registrada em {data}."
@@ -140,11 +221,10 @@ def total_gastos_categoria(categoria: str, sub_categoria: str = "", periodo: str
     except ValueError as e:
         return str(e)
 
-    query = "SELECT SUM(valor) FROM gastos WHERE categoria = %s AND sub_categoria = %s AND data >= %s"
-    erro, result = executar_query(query, (categoria, sub_categoria, data_inicio))
+    erro, totais = consultas.totais_por_periodo({periodo: data_inicio}, ("gasto",), categoria, sub_categoria)
     if erro:
         return erro
-    total_gasto = result[0][0] or 0
+    total_gasto = totais[periodo]["gasto"]
     return f"Total de gastos em {categoria} e sub-categoria {sub_categoria} no período {periodo}: {total_gasto}."
 
 # Compara os gastos totais de dois meses.
@@ -155,17 +235,11 @@ def comparar_gastos_periodo(periodo1: str, periodo2: str) -> str:
     except ValueError as e:
         return str(e)
 
-    query1 = "SELECT SUM(valor) FROM gastos WHERE data >= %s"
-    erro, result1 = executar_query(query1, (data_inicio1,))
+    erro, totais = consultas.totais_por_periodo({periodo1: data_inicio1, periodo2: data_inicio2}, tipos=("gasto",))
     if erro:
         return erro
-    total_periodo1 = result1[0][0] or 0
-
-    query2 = "SELECT SUM(valor) FROM gastos WHERE data >= %s"
-    erro, result2 = executar_query(query2, (data_inicio2,))
-    if erro:
-        return erro
-    total_periodo2 = result2[0][0] or 0
+    total_periodo1 = totais[periodo1]["gasto"]
+    total_periodo2 = totais[periodo2]["gasto"]
 
     return f"Gastos no período {periodo1}: {total_periodo1}, Gastos no período {periodo2}: {total_periodo2}."
 
@@ -176,17 +250,11 @@ def saldo_disponivel(periodo: str = "mensal") -> str:
     except ValueError as e:
         return str(e)
 
-    query_receitas = "SELECT SUM(valor) FROM receitas WHERE data >= %s"
-    erro, result_receitas = executar_query(query_receitas, (data_inicio,))
+    erro, totais = consultas.totais_por_periodo({periodo: data_inicio})
     if erro:
         return erro
-    total_receitas = result_receitas[0][0] or 0
-
-    query_gastos = "SELECT SUM(valor) FROM gastos WHERE data >= %s"
-    erro, result_gastos = executar_query(query_gastos, (data_inicio,))
-    if erro:
-        return erro
-    total_gastos = result_gastos[0][0] or 0
+    total_receitas = totais[periodo]["receita"]
+    total_gastos = totais[periodo]["gasto"]
 
     saldo = total_receitas - total_gastos
     return f"Saldo disponível no período {periodo}: {saldo}."
@@ -198,8 +266,7 @@ def sugerir_reducao_gastos(periodo: str = "mensal") -> str:
     except ValueError as e:
         return str(e)
 
-    query = "SELECT categoria, sub_categoria, SUM(valor) FROM gastos WHERE data >= %s GROUP BY categoria, sub_categoria ORDER BY SUM(valor) DESC LIMIT 1"
-    erro, result = executar_query(query, (data_inicio,))
+    erro, result = consultas.gastos_por_categoria(data_inicio, limite=1)
     if erro:
         return erro
     if result:
@@ -209,8 +276,10 @@ def sugerir_reducao_gastos(periodo: str = "mensal") -> str:
 
 # Salva um gasto ou receita em uma categoria e sub-categoria.
 def salvar_gasto_ou_receita(tipo: str, categoria: str, sub_categoria: str, valor: float, data: datetime = None) -> str:
-    if data is None:
-        data = datetime.now()
+    try:
+        data = normalizar_data(data or datetime.now())
+    except ValueError as e:
+        return str(e)
 
     if tipo == "gasto":
         query = "INSERT INTO gastos (categoria, sub_categoria, valor, data) VALUES (%s, %s, %s, %s)"
@@ -219,24 +288,188 @@ def salvar_gasto_ou_receita(tipo: str, categoria: str, sub_categoria: str, valor
     else:
         return "Tipo inválido. Use 'gasto' ou 'receita'."
 
-    erro, _ = executar_query(query, (categoria, sub_categoria, valor, data))
+    erro = _inserir_lancamento(query, (categoria, sub_categoria, valor, data), tipo, data, categoria, sub_categoria, valor)
     if erro:
         return erro
     return f"{tipo.capitalize()} de {valor} registrado na categoria '{categoria}' e sub-categoria '{sub_categoria}' em {data}."
 
-# Retorna o histórico de gastos em uma categoria e sub-categoria.
-def historico_gastos(categoria: str, sub_categoria: str = "", periodo: str = "mensal") -> str:
+# Retorna o histórico de gastos em uma categoria e sub-categoria, do mais recente para o
+# mais antigo. Mostra até limite gastos por vez: a primeira página traz o total do período
+# e, se houver mais gastos, a resposta termina com um token de continuação para a próxima.
+def historico_gastos(categoria: str, sub_categoria: str = "", periodo: str = "mensal", limite: int = LIMITE_PAGINA, continuacao: str = None) -> str:
+    depois_de = None
+    if continuacao:
+        try:
+            posicao = _ler_continuacao(continuacao, "periodo", "categoria", "sub_categoria", "data", "id")
+            depois_de = (datetime.fromisoformat(posicao["data"]), int(posicao["id"]))
+        except (ValueError, TypeError):
+            return "Token de continuação inválido."
+        categoria, sub_categoria, periodo = posicao["categoria"], posicao["sub_categoria"], posicao["periodo"]
     try:
         data_inicio = determinar_intervalo(periodo)
     except ValueError as e:
         return str(e)
 
-    query = "SELECT data, valor FROM gastos WHERE categoria = %s AND sub_categoria = %s AND data >= %s ORDER BY data DESC"
-    erro, result = executar_query(query, (categoria, sub_categoria, data_inicio))
+    erro, result = consultas.pagina_gastos(categoria, sub_categoria, data_inicio, limite + 1, depois_de)
     if erro:
         return erro
     if not result:
+        if depois_de is not None:
+            return "Não há mais gastos no histórico."
         return f"Nenhum gasto registrado na categoria '{categoria}' e sub-categoria '{sub_categoria}' no período {periodo}."
-    
-    historico_formatado = "\n".join([f"{data}: {valor}" for data, valor in result])
-    return historico_formatado
\ No newline at end of file
+
+    pagina = result[:limite]
+    historico_formatado = "\n".join([f"{data}: {valor}" for data, _, valor in pagina])
+    if len(result) > limite:
+        if depois_de is None:
+            erro, totais = consultas.totais_por_periodo({periodo: data_inicio}, ("gasto",), categoria, sub_categoria)
+            if not erro:
+                historico_formatado = (f"{totais[periodo]['quantidade_gasto']} gastos somando {totais[periodo]['gasto']} "
+                                       f"no período {periodo}. Os {limite} mais recentes:\n") + historico_formatado
+        data, id_gasto, _ = pagina[-1]
+        token = _continuacao(periodo=periodo, categoria=categoria, sub_categoria=sub_categoria, data=data.isoformat(), id=id_gasto)
+        historico_formatado += f"\nHá mais gastos. Para ver a próxima página, use: {token}"
+    return historico_formatado
+
+# Percorre todo o histórico de gastos de uma categoria e sub-categoria no período, do mais
+# recente para o mais antigo, sem montar a lista na memória (para uso fora do LLM, ex.:
+# exportações). Gera (data, valor); levanta ValueError se o período for inválido.
+def iterar_historico_gastos(categoria: str, sub_categoria: str = "", periodo: str = "mensal", tamanho_lote: int = 1000):
+    data_inicio = determinar_intervalo(periodo)
+    for data, _, valor in consultas.iterar_gastos(categoria, sub_categoria, data_inicio, tamanho_lote):
+        yield data, valor
+
+# Registra gastos e receitas em lote. Cada lançamento é um dicionário com "tipo"
+# ("gasto" ou "receita"), "valor", "categoria", "sub_categoria", "descricao" e "data".
+# Os lançamentos são validados com as mesmas regras de registrar_gasto e gravados
+# em blocos de tamanho_lote linhas, com um commit por bloco. O iterável é consumido
+# aos poucos, então pode ser um gerador sobre um arquivo grande.
+# Retorna {"inseridos": {"gasto": n, "receita": n}, "rejeitados": [(linha, motivo), ...]}.
+def registrar_lancamentos_em_lote(lancamentos, tamanho_lote: int = 1000) -> dict:
+    resultado = {"inseridos": {"gasto": 0, "receita": 0}, "rejeitados": []}
+    numerados = enumerate(lancamentos, start=1)
+    while True:
+        bloco = list(islice(numerados, tamanho_lote))
+        if not bloco:
+            break
+        linhas = {"gasto": [], "receita": []}
+        origens = {"gasto": [], "receita": []}
+        for posicao, lancamento in bloco:
+            linha = lancamento.get("linha", posicao)
+            erro, tipo, valores = _preparar_lancamento(lancamento)
+            if erro:
+                resultado["rejeitados"].append((linha, erro))
+                continue
+            linhas[tipo].append(valores)
+            origens[tipo].append(linha)
+        erro = _gravar_bloco(linhas, tamanho_lote)
+        if not erro:
+            for tipo in linhas:
+                resultado["inseridos"][tipo] += len(linhas[tipo])
+            continue
+        # Um lançamento recusado pelo banco desfaz o bloco inteiro: grava as linhas uma a
+        # uma para rejeitar só as que falharem
+        for tipo in linhas:
+            for valores, linha in zip(linhas[tipo], origens[tipo]):
+                erro = _gravar_bloco({"gasto": [], "receita": [], tipo: [valores]}, 1)
+                if erro:
+                    resultado["rejeitados"].append((linha, erro))
+                else:
+                    resultado["inseridos"][tipo] += 1
+    return resultado
+
+# Registra vários gastos em lote. Veja registrar_lancamentos_em_lote.
+def registrar_gastos_em_lote(gastos, tamanho_lote: int = 1000) -> dict:
+    return registrar_lancamentos_em_lote(({**gasto, "tipo": "gasto"} for gasto in gastos), tamanho_lote)
+
+# Registra várias receitas em lote. Veja registrar_lancamentos_em_lote.
+def registrar_receitas_em_lote(receitas, tamanho_lote: int = 1000) -> dict:
+    return registrar_lancamentos_em_lote(({**receita, "tipo": "receita"} for receita in receitas), tamanho_lote)
+
+def _preparar_lancamento(lancamento: dict) -> tuple:
+    if lancamento.get("erro"):
+        return lancamento["erro"], None, None
+    tipo = lancamento.get("tipo")
+    valor = lancamento.get("valor")
+    categoria = lancamento.get("categoria") or ""
+    sub_categoria = lancamento.get("sub_categoria") or ""
+    descricao = lancamento.get("descricao") or ""
+    try:
+        data = normalizar_data(lancamento.get("data") or datetime.now())
+    except ValueError as e:
+        return str(e), None, None
+
+    if not isinstance(valor, (int, float, Decimal)) or isinstance(valor, bool):
+        return "Valor ausente ou inválido.", None, None
+    erro = _validar_limites(valor, categoria, sub_categoria)
+    if erro:
+        return erro, None, None
+    if tipo == "gasto":
+        erro = validar_gasto(valor, categoria, descricao)
+        return erro, tipo, (valor, categoria, sub_categoria, descricao.strip(), data)
+    if tipo == "receita":
+        erro = validar_receita(valor)
+        return erro, tipo, (valor, categoria, sub_categoria, data)
+    return "Tipo inválido. Use 'gasto' ou 'receita'.", None, None
+
+# Limites das colunas de gastos e receitas (NUMERIC(10, 2) e VARCHAR(255))
+VALOR_MAXIMO = Decimal("99999999.99")
+TAMANHO_CATEGORIA = 255
+
+def _validar_limites(valor, categoria: str, sub_categoria: str) -> str:
+    if not math.isfinite(valor):
+        return "Valor ausente ou inválido."
+    if abs(Decimal(str(valor))).quantize(Decimal("0.01")) > VALOR_MAXIMO:
+        return f"Valor muito alto. O limite é {VALOR_MAXIMO}."
+    if len(categoria) > TAMANHO_CATEGORIA or len(sub_categoria) > TAMANHO_CATEGORIA:
+        return f"Categoria ou sub-categoria muito longa. O limite é {TAMANHO_CATEGORIA} caracteres."
+    return None
+
+def _gravar_bloco(linhas: dict, tamanho_lote: int) -> str:
+    try:
+        with transacao() as conn:
+            erro, _ = executar_lote(
+                "INSERT INTO gastos (valor, categoria, sub_categoria, descricao, data) VALUES %s",
+                linhas["gasto"], tamanho_lote, conn=conn,
+            )
+            if not erro:
+                erro, _ = executar_lote(
+                    "INSERT INTO receitas (valor, categoria, sub_categoria, data) VALUES %s",
+                    linhas["receita"], tamanho_lote, conn=conn,
+                )
+            if not erro:
+                erro = consolidacao.acumular(conn, "gasto", ((data, categoria, sub_categoria, valor) for valor, categoria, sub_categoria, _, data in linhas["gasto"]))
+            if not erro:
+                erro = consolidacao.acumular(conn, "receita", ((data, categoria, sub_categoria, valor) for valor, categoria, sub_categoria, data in linhas["receita"]))
+    except Exception as e:
+        return f"Erro ao gravar lote: {e}"
+    if not erro:
+        for tipo, indice_data in (("gasto", 4), ("receita", 3)):
+            if linhas[tipo]:
+                cache.invalidar(tipo, {linha[1] for linha in linhas[tipo]}, min(linha[indice_data] for linha in linhas[tipo]))
+    return erro
+
+# Importa um extrato bancário (CSV ou OFX) lendo o arquivo em fluxo, sem carregá-lo
+# inteiro na memória. Valores negativos viram gastos e positivos viram receitas.
+# Sem encoding, aceita UTF-8 e cp1252 (o padrão dos bancos brasileiros).
+def importar_extrato(caminho: str, tamanho_lote: int = 1000, categoria_padrao: str = "Importado", encoding: str = None) -> str:
+    from agents.extratos import ler_extrato
+
+    caminho = caminho.strip().strip("'\"")
+    try:
+        lancamentos = ler_extrato(caminho, categoria_padrao=categoria_padrao, encoding=encoding)
+        resultado = registrar_lancamentos_em_lote(lancamentos, tamanho_lote)
+    except (OSError, ValueError) as e:
+        return f"Erro ao importar extrato: {e}"
+
+    inseridos = resultado["inseridos"]
+    rejeitados = resultado["rejeitados"]
+    resposta = f"Extrato importado: {inseridos['gasto']} gastos e {inseridos['receita']} receitas registrados."
+    if rejeitados:
+        exemplos = "; ".join(f"linha {linha}: {motivo}" for linha, motivo in rejeitados[:5])
+        resposta += f" {len(rejeitados)} linhas rejeitadas ({exemplos})."
+    return resposta
+
+# As ferramentas deste agente são declaradas em agents/registro.py;
+# agente_financeiro cria os Tool do LangChain apenas quando é acessado.
+__getattr__ = atributo_preguicoso("financeiro")
@@ -1,8 +1,9 @@
-from langchain.tools import Tool
+from agents.registro import atributo_preguicoso
+
 
 def responder_pergunta(query: str):
     return f"🔍 Resposta baseada na IA: {query}"
 
-agente_pesquisa = [
-    Tool(name="Consultor de IA", func=responder_pergunta, description="Responde perguntas com IA.")
-]
+# As ferramentas deste agente são declaradas em agents/registro.py;
+# agente_pesquisa cria os Tool do LangChain apenas quando é acessado.
+__getattr__ = atributo_preguicoso("pesquisa")
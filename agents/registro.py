@@ -0,0 +1,107 @@
+import importlib
+import threading
+from collections import namedtuple
+
+# Registro das ferramentas dos subagentes.
+# Cada subagente declara aqui suas ferramentas apenas com metadados (nome, descrição e
+# o caminho "modulo:funcao" da implementação). Este módulo não importa LangChain, o
+# driver do banco nem os módulos dos subagentes: a implementação só é carregada quando
+# a ferramenta é chamada pela primeira vez, e os objetos Tool do LangChain só são
+# criados quando o orquestrador é montado.
+
+Ferramenta = namedtuple("Ferramenta", ["agente", "nome", "descricao", "alvo"])
+
+_PERIODO = "Entrada: período (semanal, quinzenal, mensal ou trimestral)."
+
+AGENTES = {
+    "financeiro": [
+        Ferramenta("financeiro", "Relatório de Gastos", f"Mostra o total gasto por categoria e sub-categoria, do maior para o menor. {_PERIODO} Para a próxima página, passe o token 'continuar:...' da resposta anterior.", "agents.financeiro:relatorio_gastos"),
+        Ferramenta("financeiro", "Resumo de Gastos", f"Mostra a quantidade e o valor total dos gastos. {_PERIODO}", "agents.financeiro:resumo_gastos"),
+        Ferramenta("financeiro", "Saldo Disponível", f"Calcula receitas menos gastos. {_PERIODO}", "agents.financeiro:saldo_disponivel"),
+        Ferramenta("financeiro", "Verificação de Orçamentos", f"Lista todos os orçamentos ultrapassados. {_PERIODO}", "agents.financeiro:verificar_orcamentos"),
+        Ferramenta("financeiro", "Sugestão de Economia", f"Aponta a categoria e sub-categoria com o maior gasto do período, sem comparar com o histórico. {_PERIODO}", "agents.financeiro:sugerir_reducao_gastos"),
+        Ferramenta("financeiro", "Tendências de Gastos", f"Mostra as médias móveis de 7 e 30 dias e a tendência das categorias com maior gasto. {_PERIODO}", "agents.analise:tendencias_gastos"),
+        Ferramenta("financeiro", "Sugestão de Reduções", f"Compara o gasto de cada categoria com o próprio histórico e lista as que estão acima do habitual, com quanto reduzir em cada uma. {_PERIODO}", "agents.analise:sugerir_reducoes"),
+        Ferramenta("financeiro", "Projeção de Orçamentos", f"Projeta o gasto até o fim do mês no ritmo do período e aponta os orçamentos que devem estourar. {_PERIODO}", "agents.analise:projetar_orcamentos"),
+        Ferramenta("financeiro", "Detecção de Anomalias", f"Aponta os dias do período em que alguma categoria gastou muito acima do habitual para aquele dia da semana. {_PERIODO}", "agents.analise:detectar_anomalias"),
+        Ferramenta("financeiro", "Importador de Extratos", "Importa um extrato bancário em CSV ou OFX. Entrada: caminho do arquivo.", "agents.financeiro:importar_extrato"),
+    ],
+    "agenda": [
+        Ferramenta("agenda", "Gerenciador de Agenda", "Adiciona eventos à sua agenda.", "agents.agenda:adicionar_evento"),
+        Ferramenta("agenda", "Consultor de Agenda", "Lista seus compromissos.", "agents.agenda:listar_eventos"),
+    ],
+    "trabalho": [
+        Ferramenta("trabalho", "Automação de Tarefas", "Automatiza tarefas repetitivas.", "agents.trabalho:automatizar_tarefa"),
+        Ferramenta("trabalho", "Gestão de Projetos", "Organiza e planeja projetos.", "agents.trabalho:organizar_projeto"),
+    ],
+    "pesquisa": [
+        Ferramenta("pesquisa", "Consultor de IA", "Responde perguntas com IA.", "agents.pesquisa:responder_pergunta"),
+    ],
+}
+
+_carregadas = {}
+_lock = threading.Lock()
+
+
+# Importa (uma única vez) a função apontada por "modulo:funcao"
+def carregar(alvo: str):
+    funcao = _carregadas.get(alvo)
+    if funcao is None:
+        with _lock:
+            funcao = _carregadas.get(alvo)
+            if funcao is None:
+                modulo, nome = alvo.split(":")
+                funcao = getattr(importlib.import_module(modulo), nome)
+                _carregadas[alvo] = funcao
+    return funcao
+
+
+def ferramentas(agentes=None) -> list:
+    agentes = AGENTES if agentes is None else [agentes] if isinstance(agentes, str) else agentes
+    return [ferramenta for agente in agentes for ferramenta in AGENTES[agente]]
+
+
+def obter(nome: str) -> Ferramenta:
+    for ferramenta in ferramentas():
+        if ferramenta.nome == nome:
+            return ferramenta
+    raise KeyError(f"Ferramenta '{nome}' não registrada.")
+
+
+# Executa uma ferramenta pelo nome, carregando sua implementação se necessário.
+def executar(nome: str, *args, **kwargs):
+    return carregar(obter(nome).alvo)(*args, **kwargs)
+
+
+def _preguicosa(ferramenta: Ferramenta):
+    def executar_ferramenta(*args, **kwargs):
+        return carregar(ferramenta.alvo)(*args, **kwargs)
+
+    executar_ferramenta.__name__ = ferramenta.alvo.split(":")[1]
+    executar_ferramenta.__doc__ = ferramenta.descricao
+    return executar_ferramenta
+
+
+# Cria os Tool do LangChain das ferramentas registradas (de todos os agentes ou só dos
+# indicados). A implementação de cada ferramenta continua sendo carregada só no primeiro uso.
+def ferramentas_langchain(agentes=None) -> list:
+    from langchain.tools import Tool
+
+    return [
+        Tool(name=ferramenta.nome, func=_preguicosa(ferramenta), description=ferramenta.descricao)
+        for ferramenta in ferramentas(agentes)
+    ]
+
+
+# __getattr__ de módulo para os subagentes: o atributo agente_<agente> cria os Tool do
+# LangChain apenas quando é acessado. Uso no módulo do subagente:
+#     __getattr__ = atributo_preguicoso("agenda")
+def atributo_preguicoso(agente: str):
+    nome_atributo = f"agente_{agente}"
+
+    def __getattr__(nome):
+        if nome == nome_atributo:
+            return ferramentas_langchain(agente)
+        raise AttributeError(nome)
+
+    return __getattr__
@@ -1,4 +1,5 @@
-from langchain.tools import Tool
+from agents.registro import atributo_preguicoso
+
 
 def automatizar_tarefa(query: str):
     return f"⚙️ Automatizando tarefa: {query}"
@@ -6,7 +7,6 @@ def automatizar_tarefa(query: str):
 def organizar_projeto(query: str):
     return f"📁 Criando um plano para o projeto: {query}"
 
-agente_trabalho = [
-    Tool(name="Automação de Tarefas", func=automatizar_tarefa, description="Automatiza tarefas repetitivas."),
-    Tool(name="Gestão de Projetos", func=organizar_projeto, description="Organiza e planeja projetos.")
-]
+# As ferramentas deste agente são declaradas em agents/registro.py;
+# agente_trabalho cria os Tool do LangChain apenas quando é acessado.
+__getattr__ = atributo_preguicoso("trabalho")
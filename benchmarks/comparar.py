@@ -0,0 +1,51 @@
+import argparse
+import json
+
+# Compara dois resultados JSON de benchmark (ex.: antes e depois de uma mudança).
+# Percorre os dois arquivos e lista cada medida numérica presente em ambos com a
+# variação percentual; por padrão mostra só as métricas p50/p99 e linhas varridas.
+#
+# Uso: python -m benchmarks.comparar antes.json depois.json [--todas] [--limiar 5]
+
+METRICAS = ("p50", "p99", "linhas_varridas", "importacao_ms")
+
+
+def _folhas(dados, caminho: tuple = ()):
+    if isinstance(dados, dict):
+        for chave, valor in dados.items():
+            yield from _folhas(valor, caminho + (str(chave),))
+    elif isinstance(dados, (int, float)) and not isinstance(dados, bool):
+        yield caminho, dados
+
+
+def comparar(antes: dict, depois: dict, todas: bool = False) -> list:
+    valores_depois = dict(_folhas(depois))
+    linhas = []
+    for caminho, valor_antes in _folhas(antes):
+        if caminho not in valores_depois or caminho[0] in ("configuracao", "tabelas"):
+            continue
+        if not todas and caminho[-1] not in METRICAS:
+            continue
+        valor_depois = valores_depois[caminho]
+        variacao = (valor_depois - valor_antes) / valor_antes * 100 if valor_antes else 0.0
+        linhas.append(("/".join(caminho), valor_antes, valor_depois, variacao))
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument("antes")
+    parser.add_argument("depois")
+    parser.add_argument("--todas", action="store_true", help="Mostra todas as medidas numéricas.")
+    parser.add_argument("--limiar", type=float, default=0.0, help="Só mostra variações acima deste percentual.")
+    args = parser.parse_args()
+
+    with open(args.antes, encoding="utf-8") as arquivo:
+        antes = json.load(arquivo)
+    with open(args.depois, encoding="utf-8") as arquivo:
+        depois = json.load(arquivo)
+    print(f"antes:  {antes.get('data', '?')} ({antes.get('commit', '?')})")
+    print(f"depois: {depois.get('data', '?')} ({depois.get('commit', '?')})")
+    for caminho, valor_antes, valor_depois, variacao in comparar(antes, depois, args.todas):
+        if abs(variacao) >= args.limiar:
+            print(f"{caminho:<70} {valor_antes:>12.2f} {valor_depois:>12.2f} {variacao:>+8.1f}%")
@@ -0,0 +1,182 @@
+import argparse
+import json
+import time
+from dotenv import load_dotenv
+from benchmarks.medidas import percentis, salvar
+
+# Benchmark das ferramentas do subagente financeiro.
+# Mede a latência (p50/p90/p99/máx.) de cada ferramenta em cada período, a sobrecarga
+# do executar_query em relação a um cursor direto e, com EXPLAIN ANALYZE, quantas linhas
+# cada consulta varre (só no PostgreSQL). Por padrão o cache fica desligado para medir o banco; use
+# --com-cache para medir o caminho com cache. Salva tudo em JSON para comparar execuções
+# com benchmarks/comparar.py.
+#
+# Uso (depois de popular o banco com benchmarks/gerador.py):
+#   python -m benchmarks.financeiro --env .env.bench --repeticoes 20 --saida antes.json
+
+PERIODOS = ("semanal", "quinzenal", "mensal", "trimestral")
+
+
+# Ferramentas medidas: nome -> função que recebe (periodo, categoria, sub_categoria)
+def _ferramentas() -> dict:
+    from agents import analise, financeiro
+
+    return {
+        "resumo_gastos": lambda periodo, categoria, sub: financeiro.resumo_gastos(periodo),
+        "relatorio_gastos": lambda periodo, categoria, sub: financeiro.relatorio_gastos(periodo),
+        "saldo_disponivel": lambda periodo, categoria, sub: financeiro.saldo_disponivel(periodo),
+        "sugerir_reducao_gastos": lambda periodo, categoria, sub: financeiro.sugerir_reducao_gastos(periodo),
+        "verificar_orcamentos": lambda periodo, categoria, sub: financeiro.verificar_orcamentos(periodo),
+        "analisar_gastos": lambda periodo, categoria, sub: financeiro.analisar_gastos(categoria, sub, periodo),
+        "total_gastos_categoria": lambda periodo, categoria, sub: financeiro.total_gastos_categoria(categoria, sub, periodo),
+        "historico_gastos": lambda periodo, categoria, sub: financeiro.historico_gastos(categoria, sub, periodo),
+        "comparar_gastos_periodo": lambda periodo, categoria, sub: financeiro.comparar_gastos_periodo(periodo, "trimestral"),
+        "tendencias_gastos": lambda periodo, categoria, sub: analise.tendencias_gastos(periodo),
+        "sugerir_reducoes": lambda periodo, categoria, sub: analise.sugerir_reducoes(periodo),
+        "projetar_orcamentos": lambda periodo, categoria, sub: analise.projetar_orcamentos(periodo),
+        "detectar_anomalias": lambda periodo, categoria, sub: analise.detectar_anomalias(periodo),
+    }
+
+
+# Guarda as queries executadas (via observador do executar_query) durante uma chamada
+class Gravador:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query: str, params: tuple, duracao: float, linhas: int):
+        self.queries.append((query, params, duracao, linhas))
+
+
+# Soma as linhas lidas pelos nós de varredura de um plano do EXPLAIN (ANALYZE, FORMAT JSON):
+# linhas retornadas por volta vezes o número de voltas, mais as descartadas pelo filtro.
+def _linhas_varridas(plano: dict) -> int:
+    total = 0
+    if "Scan" in plano.get("Node Type", ""):
+        voltas = plano.get("Actual Loops", 1)
+        total += (plano.get("Actual Rows", 0) + plano.get("Rows Removed by Filter", 0)
+                  + plano.get("Rows Removed by Index Recheck", 0)) * voltas
+    for filho in plano.get("Plans", []):
+        total += _linhas_varridas(filho)
+    return total
+
+
+def explicar(query: str, params: tuple) -> dict:
+    from config.settings import transacao
+
+    with transacao() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+            resultado = cursor.fetchone()[0]
+        conn.rollback()
+    resultado = resultado[0] if isinstance(resultado, list) else json.loads(resultado)[0]
+    plano = resultado["Plan"]
+    return {
+        "linhas_varridas": _linhas_varridas(plano),
+        "linhas_retornadas": plano.get("Actual Rows", 0),
+        "blocos_lidos": plano.get("Shared Hit Blocks", 0) + plano.get("Shared Read Blocks", 0),
+        "tempo_execucao_ms": resultado.get("Execution Time", 0.0),
+        "tempo_planejamento_ms": resultado.get("Planning Time", 0.0),
+    }
+
+
+# Sobrecarga do executar_query (pool, transação, commit) sobre um cursor já aberto
+def medir_sobrecarga(repeticoes: int) -> dict:
+    from config.settings import executar_query, transacao
+
+    direto, via_executar = [], []
+    with transacao() as conn:
+        with conn.cursor() as cursor:
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                direto.append((time.perf_counter() - inicio) * 1000)
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        executar_query("SELECT 1")
+        via_executar.append((time.perf_counter() - inicio) * 1000)
+    return {"cursor_direto": percentis(direto), "executar_query": percentis(via_executar)}
+
+
+def _categoria_principal() -> tuple:
+    from agents import consultas
+    from agents.financeiro import determinar_intervalo
+
+    erro, result = consultas.gastos_por_categoria(determinar_intervalo("trimestral"), limite=1)
+    if erro or not result:
+        return "Alimentação", ""
+    return result[0][0], result[0][1]
+
+
+def executar(repeticoes: int = 10, aquecimento: int = 2, periodos=PERIODOS, ferramentas=None,
+             com_cache: bool = False, explain: bool = True) -> dict:
+    from agents import cache
+    from config.settings import adicionar_observador, remover_observador, backend, executar_query
+
+    # EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) existe apenas no PostgreSQL
+    explain = explain and backend() == "postgres"
+    cache.CACHE_ATIVO = com_cache
+    cache.limpar()
+    categoria, sub_categoria = _categoria_principal()
+    medidas = _ferramentas()
+    if ferramentas:
+        medidas = {nome: medidas[nome] for nome in ferramentas}
+
+    _, linhas = executar_query("SELECT (SELECT COUNT(*) FROM gastos), (SELECT COUNT(*) FROM receitas), "
+                               "(SELECT COUNT(*) FROM consolidado_diario)")
+    resultado = {
+        "configuracao": {"repeticoes": repeticoes, "com_cache": com_cache, "backend": backend(),
+                         "categoria": categoria, "sub_categoria": sub_categoria},
+        "tabelas": dict(zip(("gastos", "receitas", "consolidado_diario"), linhas[0])),
+        "sobrecarga_executar_query": medir_sobrecarga(max(repeticoes, 50)),
+        "ferramentas": {},
+    }
+
+    for nome, funcao in medidas.items():
+        resultado["ferramentas"][nome] = {}
+        for periodo in periodos:
+            for _ in range(aquecimento):
+                funcao(periodo, categoria, sub_categoria)
+
+            amostras = []
+            gravador = Gravador()
+            adicionar_observador(gravador)
+            try:
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    funcao(periodo, categoria, sub_categoria)
+                    amostras.append((time.perf_counter() - inicio) * 1000)
+            finally:
+                remover_observador(gravador)
+
+            medida = {"latencia_ms": percentis(amostras),
+                      "queries_por_chamada": len(gravador.queries) / repeticoes}
+            if explain and gravador.queries:
+                por_chamada = gravador.queries[:max(1, len(gravador.queries) // repeticoes)]
+                medida["planos"] = [explicar(query, params) for query, params, _, _ in por_chamada
+                                    if query.lstrip().upper().startswith("SELECT")]
+                medida["linhas_varridas"] = sum(plano["linhas_varridas"] for plano in medida["planos"])
+            resultado["ferramentas"][nome][periodo] = medida
+            print(f"{nome:<25} {periodo:<11} p50={medida['latencia_ms']['p50']:8.2f}ms "
+                  f"p99={medida['latencia_ms']['p99']:8.2f}ms linhas={medida.get('linhas_varridas', '-')}")
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das ferramentas financeiras.")
+    parser.add_argument("--env", help="Arquivo .env do banco de benchmark.")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--aquecimento", type=int, default=2)
+    parser.add_argument("--periodos", nargs="+", default=PERIODOS, choices=PERIODOS)
+    parser.add_argument("--ferramentas", nargs="+", help="Mede só estas ferramentas.")
+    parser.add_argument("--com-cache", action="store_true", help="Mantém o cache de consultas ligado.")
+    parser.add_argument("--sem-explain", action="store_true", help="Não roda EXPLAIN ANALYZE.")
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    args = parser.parse_args()
+
+    if args.env:
+        load_dotenv(args.env, override=True)
+    resultado = executar(args.repeticoes, args.aquecimento, args.periodos, args.ferramentas,
+                         args.com_cache, not args.sem_explain)
+    if args.saida:
+        salvar(resultado, args.saida)
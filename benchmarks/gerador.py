@@ -0,0 +1,148 @@
+import argparse
+import itertools
+import random
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Gerador de dados sintéticos para os benchmarks do subagente financeiro.
+# Gera gastos diários ao longo de vários anos (até dezenas de milhões de linhas),
+# receitas mensais e um orçamento por sub-categoria, carregando tudo com COPY a partir
+# de um gerador, sem montar os dados na memória (no SQLite, com INSERTs em lotes). Ao
+# final reconstrói o consolidado diário e roda ANALYZE.
+#
+# Use um banco local descartável:
+#   python -m benchmarks.gerador --env .env.bench --limpar --anos 3 --gastos-por-dia 200
+
+# Linhas por INSERT em lote no SQLite
+LOTE_SQLITE = 10000
+
+
+# Arquivo somente leitura sobre um gerador de linhas, usado pelo COPY FROM STDIN
+class ArquivoGerador:
+    def __init__(self, linhas):
+        self._linhas = iter(linhas)
+        self._buffer = ""
+
+    def read(self, tamanho: int = -1) -> str:
+        while tamanho < 0 or len(self._buffer) < tamanho:
+            linha = next(self._linhas, None)
+            if linha is None:
+                break
+            self._buffer += linha
+        if tamanho < 0:
+            tamanho = len(self._buffer)
+        pedaco, self._buffer = self._buffer[:tamanho], self._buffer[tamanho:]
+        return pedaco
+
+
+# Formata tuplas no formato texto do COPY (colunas separadas por tabulação)
+def _linhas_copy(linhas):
+    for linha in linhas:
+        yield "\t".join(map(str, linha)) + "\n"
+
+
+def _inserir_em_lotes(conn, query: str, linhas):
+    from config.settings import executar_lote
+
+    while True:
+        lote = list(itertools.islice(linhas, LOTE_SQLITE))
+        if not lote:
+            return
+        erro, _ = executar_lote(query, lote, conn=conn)
+        if erro:
+            raise RuntimeError(erro)
+
+
+def categorias_sinteticas(categorias: int, subcategorias: int) -> list:
+    return [(f"Categoria {c:02d}", f"Sub {c:02d}.{s:02d}") for c in range(categorias) for s in range(subcategorias)]
+
+
+def _gastos(pares: list, inicio: datetime, dias: int, por_dia: int, aleatorio: random.Random):
+    # Pesos diferentes por sub-categoria para que os relatórios tenham um "maior gasto"
+    pesos = [aleatorio.paretovariate(1.5) for _ in pares]
+    for dia in range(dias):
+        base = inicio + timedelta(days=dia)
+        escolhidos = aleatorio.choices(pares, weights=pesos, k=por_dia)
+        for categoria, sub_categoria in escolhidos:
+            momento = base + timedelta(seconds=aleatorio.randrange(86400))
+            valor = round(aleatorio.lognormvariate(3.5, 0.8), 2)
+            yield valor, categoria, sub_categoria, "gasto sintético", momento
+
+
+def _receitas(inicio: datetime, dias: int, aleatorio: random.Random):
+    dia = inicio
+    while dia < inicio + timedelta(days=dias):
+        yield round(aleatorio.uniform(8000, 12000), 2), "Salário", "", dia
+        dia += timedelta(days=30)
+
+
+def gerar(categorias: int = 10, subcategorias: int = 5, anos: float = 1, gastos_por_dia: int = 50,
+          limpar: bool = False, semente: int = 42) -> dict:
+    from config.settings import backend, executar_query, transacao
+    from agents.consolidacao import reconstruir_consolidado
+
+    aleatorio = random.Random(semente)
+    pares = categorias_sinteticas(categorias, subcategorias)
+    dias = int(anos * 365)
+    inicio = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=dias - 1)
+
+    gastos = _gastos(pares, inicio, dias, gastos_por_dia, aleatorio)
+    receitas = _receitas(inicio, dias, aleatorio)
+    with transacao() as conn:
+        with conn.cursor() as cursor:
+            if backend() == "sqlite":
+                if limpar:
+                    for tabela in ("gastos", "receitas", "orcamentos", "consolidado_diario"):
+                        cursor.execute(f"DELETE FROM {tabela}")
+                _inserir_em_lotes(conn, "INSERT INTO gastos (valor, categoria, sub_categoria, descricao, data) "
+                                        "VALUES %s", gastos)
+                _inserir_em_lotes(conn, "INSERT INTO receitas (valor, categoria, sub_categoria, data) VALUES %s",
+                                  receitas)
+            else:
+                if limpar:
+                    cursor.execute("TRUNCATE gastos, receitas, orcamentos, consolidado_diario")
+                cursor.copy_expert(
+                    "COPY gastos (valor, categoria, sub_categoria, descricao, data) FROM STDIN",
+                    ArquivoGerador(_linhas_copy(gastos)),
+                )
+                cursor.copy_expert(
+                    "COPY receitas (valor, categoria, sub_categoria, data) FROM STDIN",
+                    ArquivoGerador(_linhas_copy(receitas)),
+                )
+            for categoria, sub_categoria in pares:
+                cursor.execute(
+                    "INSERT INTO orcamentos (categoria, sub_categoria, limite) VALUES (%s, %s, %s) "
+                    "ON CONFLICT (categoria, sub_categoria) DO NOTHING",
+                    (categoria, sub_categoria, round(aleatorio.uniform(100, 3000), 2)),
+                )
+
+    print(reconstruir_consolidado())
+    for tabela in ("gastos", "receitas", "consolidado_diario"):
+        executar_query(f"ANALYZE {tabela}")
+
+    return {
+        "categorias": categorias,
+        "subcategorias": subcategorias,
+        "dias": dias,
+        "gastos": dias * gastos_por_dia,
+        "inicio": inicio.date().isoformat(),
+        "semente": semente,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de gastos e receitas.")
+    parser.add_argument("--env", help="Arquivo .env do banco de benchmark.")
+    parser.add_argument("--categorias", type=int, default=10)
+    parser.add_argument("--subcategorias", type=int, default=5, help="Sub-categorias por categoria.")
+    parser.add_argument("--anos", type=float, default=1)
+    parser.add_argument("--gastos-por-dia", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--limpar", action="store_true", help="Apaga gastos, receitas e orçamentos antes de gerar.")
+    args = parser.parse_args()
+
+    if args.env:
+        load_dotenv(args.env, override=True)
+    resumo = gerar(args.categorias, args.subcategorias, args.anos, args.gastos_por_dia, args.limpar, args.semente)
+    print(f"{resumo['gastos']} gastos gerados em {resumo['dias']} dias "
+          f"({resumo['categorias']} categorias x {resumo['subcategorias']} sub-categorias).")
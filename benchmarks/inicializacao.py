@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Benchmark de inicialização a frio.
+# Importa um módulo (por padrão, main) em processos Python novos com -X importtime e
+# mede o tempo total, o tempo de importação acumulado e os módulos mais caros. Também
+# aponta se módulos pesados (LangChain, driver do banco, cliente OpenAI) foram
+# carregados na importação, o que não deveria acontecer com o registro preguiçoso.
+#
+# Uso: python -m benchmarks.inicializacao [--modulo main] [--repeticoes 5] [--saida resultado.json]
+
+MODULOS_PESADOS = ("langchain", "langchain_core", "langchain_openai", "openai", "psycopg2", "numpy")
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _medir(modulo: str) -> dict:
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True,
+    )
+    parede_ms = (time.perf_counter() - inicio) * 1000
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr}")
+
+    importacoes = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        importacoes.append((nome.strip(), int(proprio), int(acumulado)))
+
+    raizes = {nome: acumulado for nome, _, acumulado in importacoes if not nome.startswith(" ")}
+    carregados = {nome.strip() for nome, _, _ in importacoes}
+    return {
+        "parede_ms": parede_ms,
+        "importacao_ms": raizes.get(modulo, 0) / 1000,
+        "mais_caros": sorted(((nome.strip(), acumulado / 1000) for nome, _, acumulado in importacoes),
+                             key=lambda item: item[1], reverse=True)[:10],
+        "pesados_carregados": sorted(m for m in MODULOS_PESADOS if m in carregados),
+    }
+
+
+def executar(modulo: str = "main", repeticoes: int = 5) -> dict:
+    medicoes = [_medir(modulo) for _ in range(repeticoes)]
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "modulo": modulo,
+        "repeticoes": repeticoes,
+        "parede_ms": {"mediana": statistics.median(m["parede_ms"] for m in medicoes),
+                      "min": min(m["parede_ms"] for m in medicoes)},
+        "importacao_ms": {"mediana": statistics.median(m["importacao_ms"] for m in medicoes),
+                          "min": min(m["importacao_ms"] for m in medicoes)},
+        "mais_caros": medicoes[-1]["mais_caros"],
+        "pesados_carregados": medicoes[-1]["pesados_carregados"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização a frio.")
+    parser.add_argument("--modulo", default="main")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="Arquivo JSON onde salvar o resultado.")
+    args = parser.parse_args()
+
+    resultado = executar(args.modulo, args.repeticoes)
+    print(f"import {resultado['modulo']}: {resultado['importacao_ms']['mediana']:.1f} ms "
+          f"(processo: {resultado['parede_ms']['mediana']:.1f} ms, mediana de {args.repeticoes})")
+    for nome, ms in resultado["mais_caros"]:
+        print(f"  {ms:8.1f} ms  {nome}")
+    if resultado["pesados_carregados"]:
+        print(f"Atenção: módulos pesados carregados na importação: {', '.join(resultado['pesados_carregados'])}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
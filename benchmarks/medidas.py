@@ -0,0 +1,49 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+# Funções comuns aos benchmarks: percentis de latência e gravação dos resultados em JSON.
+
+
+def percentis(amostras_ms: list) -> dict:
+    ordenadas = sorted(amostras_ms)
+
+    def percentil(p: float) -> float:
+        if not ordenadas:
+            return 0.0
+        indice = (len(ordenadas) - 1) * p / 100
+        inferior = int(indice)
+        superior = min(inferior + 1, len(ordenadas) - 1)
+        return ordenadas[inferior] + (ordenadas[superior] - ordenadas[inferior]) * (indice - inferior)
+
+    return {
+        "n": len(ordenadas),
+        "p50": percentil(50),
+        "p90": percentil(90),
+        "p99": percentil(99),
+        "max": ordenadas[-1] if ordenadas else 0.0,
+        "media": statistics.fmean(ordenadas) if ordenadas else 0.0,
+    }
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+# Acrescenta metadados (data, commit, versão do Python) e salva o resultado em JSON
+def salvar(resultado: dict, caminho: str):
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": sys.version.split()[0],
+        **resultado,
+    }
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False, default=str)
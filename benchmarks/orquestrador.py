@@ -0,0 +1,90 @@
+import argparse
+import time
+from dotenv import load_dotenv
+from benchmarks.medidas import percentis, salvar
+
+# Benchmark de ponta a ponta do orquestrador com um LLM falso.
+# O FakeListLLM do LangChain devolve respostas roteirizadas (escolhe uma ferramenta e
+# depois dá a resposta final), então o tempo medido é o do agente, das ferramentas e do
+# banco, sem a latência da API. Também mede os mesmos pedidos pelo roteador (roteador.py),
+# que dispensa o LLM para comandos conhecidos.
+#
+# Uso: python -m benchmarks.orquestrador --env .env.bench --repeticoes 20 --saida orquestrador.json
+
+# (pedido, ferramenta escolhida pelo LLM falso, entrada da ferramenta)
+CENARIOS = [
+    ("Qual é o meu saldo mensal?", "Saldo Disponível", "mensal"),
+    ("Mostre o relatório de gastos trimestral", "Relatório de Gastos", "trimestral"),
+    ("Resumo de gastos da semana", "Resumo de Gastos", "semanal"),
+    ("Verifique os orçamentos do mês", "Verificação de Orçamentos", "mensal"),
+    ("Onde posso economizar no trimestre?", "Sugestão de Economia", "trimestral"),
+]
+
+
+# Respostas do LLM falso para um cenário: chamar a ferramenta e responder com o resultado
+def roteiro(ferramenta: str, entrada: str) -> list:
+    return [
+        f"Preciso consultar a ferramenta.\nAction: {ferramenta}\nAction Input: {entrada}",
+        "Já tenho a resposta.\nFinal Answer: consulta concluída.",
+    ]
+
+
+def _medir_orquestrador(pedido: str, ferramenta: str, entrada: str, repeticoes: int) -> list:
+    from langchain_core.language_models.fake import FakeListLLM
+    from main import criar_orquestrador
+
+    amostras = []
+    for _ in range(repeticoes):
+        agente = criar_orquestrador(FakeListLLM(responses=roteiro(ferramenta, entrada)), verbose=False)
+        inicio = time.perf_counter()
+        agente.run(pedido)
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return amostras
+
+
+def _medir_roteador(pedido: str, repeticoes: int) -> list:
+    from roteador import Roteador
+
+    roteador = Roteador(fallback=lambda texto: "")
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        roteador.responder(pedido)
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return amostras
+
+
+def executar(repeticoes: int = 10, com_cache: bool = False) -> dict:
+    from agents import cache
+
+    cache.CACHE_ATIVO = com_cache
+    cache.limpar()
+
+    inicio = time.perf_counter()
+    _medir_orquestrador(*CENARIOS[0], repeticoes=1)
+    resultado = {
+        "configuracao": {"repeticoes": repeticoes, "com_cache": com_cache},
+        "primeira_chamada_ms": (time.perf_counter() - inicio) * 1000,
+        "cenarios": {},
+    }
+    for pedido, ferramenta, entrada in CENARIOS:
+        orquestrador = percentis(_medir_orquestrador(pedido, ferramenta, entrada, repeticoes))
+        roteado = percentis(_medir_roteador(pedido, repeticoes))
+        resultado["cenarios"][pedido] = {"ferramenta": ferramenta, "orquestrador_ms": orquestrador, "roteador_ms": roteado}
+        print(f"{pedido:<40} orquestrador p50={orquestrador['p50']:8.2f}ms  roteador p50={roteado['p50']:8.2f}ms")
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do orquestrador com LLM falso.")
+    parser.add_argument("--env", help="Arquivo .env do banco de benchmark.")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--com-cache", action="store_true", help="Mantém o cache de consultas ligado.")
+    parser.add_argument("--saida", help="Salva o resultado em JSON.")
+    args = parser.parse_args()
+
+    if args.env:
+        load_dotenv(args.env, override=True)
+    resultado = executar(args.repeticoes, args.com_cache)
+    if args.saida:
+        salvar(resultado, args.saida)
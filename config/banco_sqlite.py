@@ -0,0 +1,222 @@
+import math
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from config.settings import TRANSACAO_ABERTA, TRANSACAO_COM_ERRO, TRANSACAO_OCIOSA
+
+# Backend embutido (SQLite) para o executar_query.
+#
+# Com DB_BACKEND=sqlite no .env, o pool de config/settings.py entrega conexões deste
+# módulo em vez do PostgreSQL. Elas imitam o que o resto do código usa do psycopg2:
+# cursores como context manager, placeholders %s, transação aberta no primeiro comando
+# (BEGIN implícito, confirmada por commit/rollback), conn.closed e
+# get_transaction_status(), inclusive o estado de erro que obriga um rollback. Assim as
+# funções de agents/ e o migrar.py rodam sem mudanças sobre um arquivo local, sem
+# precisar do psycopg2 instalado.
+#
+# O banco usa WAL: leitores não bloqueiam o escritor e vice-versa, e com
+# synchronous=NORMAL cada commit não espera o fsync. Apenas um escritor por vez; os
+# demais aguardam até DB_POOL_TIMEOUT segundos pelo lock.
+#
+# O SQL do PostgreSQL é traduzido no que difere (SERIAL, índices BRIN, DEFAULT
+# CURRENT_TIMESTAMP em UTC). LOCK TABLE e pg_advisory_xact_lock não fazem nada: o SQLite
+# já bloqueia o banco inteiro na primeira escrita da transação.
+#
+# Datas e horários são gravados como texto ISO, que ordena corretamente, e lidos como
+# date/datetime nas colunas DATE e TIMESTAMP. O SQLite guarda NUMERIC como REAL; os
+# valores lidos voltam como Decimal (como no psycopg2) com os 15 dígitos significativos
+# que o REAL garante, e o SUM soma com math.fsum para que o resultado não acumule erros
+# de arredondamento. Consultas que pedem CAST(... AS DOUBLE PRECISION) continuam
+# recebendo float.
+
+# Traduções aplicadas a todo SQL antes de executá-lo no SQLite
+TRADUCOES = [
+    (re.compile(r"\bSERIAL PRIMARY KEY\b", re.IGNORECASE), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bUSING brin\s*", re.IGNORECASE), ""),
+    (re.compile(r"\bDEFAULT CURRENT_TIMESTAMP\b", re.IGNORECASE), "DEFAULT (datetime('now', 'localtime'))"),
+    (re.compile(r"%([s%])"), lambda m: "?" if m.group(1) == "s" else "%"),
+]
+
+# Comandos do PostgreSQL sem efeito no SQLite
+SEM_EFEITO = re.compile(r"^\s*(?:LOCK TABLE|SELECT pg_advisory_xact_lock)\b", re.IGNORECASE)
+
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(" "))
+sqlite3.register_converter("DATE", lambda valor: date.fromisoformat(valor.decode()[:10]))
+sqlite3.register_converter("TIMESTAMP", lambda valor: datetime.fromisoformat(valor.decode()))
+
+
+# Traduz a query e a separa em comandos (o sqlite3 executa um por vez).
+# Retorna uma tupla vazia para comandos sem efeito.
+@lru_cache(maxsize=512)
+def traduzir(query: str) -> tuple:
+    if SEM_EFEITO.match(query):
+        return ()
+    for padrao, substituto in TRADUCOES:
+        query = padrao.sub(substituto, query)
+    comandos = tuple(comando for comando in query.split(";") if comando.strip())
+    return comandos or (query,)
+
+
+# SUM sem erro acumulado de arredondamento (o SUM nativo compensa a partir do SQLite 3.43)
+class Soma:
+    def __init__(self):
+        self.valores = []
+
+    def step(self, valor):
+        if valor is not None:
+            self.valores.append(valor)
+
+    def finalize(self):
+        if not self.valores:
+            return None
+        if all(type(valor) is int for valor in self.valores):
+            return sum(self.valores)
+        return math.fsum(self.valores)
+
+
+def _decimal(valor):
+    return Decimal(f"{valor:.15g}") if type(valor) is float else valor
+
+
+class CursorSqlite(sqlite3.Cursor):
+    # Aceito para compatibilidade com cursores nomeados do psycopg2; o sqlite3 já lê aos poucos
+    itersize = 2000
+    # Converte os float do resultado em Decimal (desligado para DOUBLE PRECISION)
+    decimais = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def execute(self, query, params=()):
+        self.decimais = "DOUBLE PRECISION" not in query.upper()
+        for comando in traduzir(query):
+            self._executar(super().execute, comando, params or ())
+        return self
+
+    def executemany(self, query, linhas):
+        for comando in traduzir(query):
+            self._executar(super().executemany, comando, linhas)
+        return self
+
+    def fetchone(self):
+        linha = super().fetchone()
+        return tuple(map(_decimal, linha)) if linha is not None and self.decimais else linha
+
+    def fetchmany(self, tamanho: int = None):
+        linhas = super().fetchmany(self.arraysize if tamanho is None else tamanho)
+        return [tuple(map(_decimal, linha)) for linha in linhas] if self.decimais else linhas
+
+    def fetchall(self):
+        linhas = super().fetchall()
+        return [tuple(map(_decimal, linha)) for linha in linhas] if self.decimais else linhas
+
+    def __next__(self):
+        linha = super().__next__()
+        return tuple(map(_decimal, linha)) if self.decimais else linha
+
+    def _executar(self, executar, comando: str, params):
+        conn = self.connection
+        if conn.abortada:
+            raise sqlite3.OperationalError(
+                "A transação atual foi abortada; os comandos são ignorados até o rollback."
+            )
+        try:
+            if not conn.in_transaction:
+                super().execute("BEGIN")
+            executar(comando, params)
+        except sqlite3.Error:
+            conn.abortada = True
+            raise
+
+
+class ConexaoSqlite(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = 0
+        self.abortada = False
+
+    def cursor(self, name=None, factory=CursorSqlite):
+        return super().cursor(factory)
+
+    def commit(self):
+        # Como no PostgreSQL, confirmar uma transação com erro a desfaz
+        if self.abortada:
+            self.rollback()
+        else:
+            super().commit()
+
+    def rollback(self):
+        self.abortada = False
+        super().rollback()
+
+    def close(self):
+        self.closed = 1
+        super().close()
+
+    def get_transaction_status(self) -> int:
+        if self.abortada:
+            return TRANSACAO_COM_ERRO
+        if self.in_transaction:
+            return TRANSACAO_ABERTA
+        return TRANSACAO_OCIOSA
+
+
+def conectar(caminho: str, timeout: float = 30) -> ConexaoSqlite:
+    conn = sqlite3.connect(
+        caminho,
+        timeout=timeout,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        isolation_level=None,  # as transações são abertas pelo CursorSqlite
+        check_same_thread=False,  # o pool entrega cada conexão a uma thread por vez
+        cached_statements=256,
+        uri=caminho.startswith("file:"),
+        factory=ConexaoSqlite,
+    )
+    if sqlite3.sqlite_version_info < (3, 43):
+        conn.create_aggregate("SUM", 1, Soma)
+    cursor = sqlite3.Cursor(conn)
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+    return conn
+
+
+# Pool com a mesma interface do ThreadedConnectionPool usada em config/settings.py.
+# O limite de conexões simultâneas fica com o semáforo de settings.
+class PoolSqlite:
+    def __init__(self, minconn: int, maxconn: int, caminho: str, timeout: float = 30):
+        self.caminho = caminho
+        self.timeout = timeout
+        self.closed = False
+        self._lock = threading.Lock()
+        self._livres = [conectar(caminho, timeout) for _ in range(min(minconn, maxconn))]
+
+    def getconn(self) -> ConexaoSqlite:
+        with self._lock:
+            if self._livres:
+                return self._livres.pop()
+        return conectar(self.caminho, self.timeout)
+
+    def putconn(self, conn, close: bool = False):
+        if not close and not conn.closed:
+            with self._lock:
+                if not self.closed:
+                    self._livres.append(conn)
+                    return
+        if not conn.closed:
+            conn.close()
+
+    def closeall(self):
+        with self._lock:
+            self.closed = True
+            livres, self._livres = self._livres, []
+        for conn in livres:
+            conn.close()
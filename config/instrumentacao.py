@@ -0,0 +1,340 @@
+import os
+import time
+import bisect
+import hashlib
+import logging
+import threading
+from collections import deque
+from dotenv import load_dotenv
+
+# Instrumentação opcional do Brain Zap.
+#
+# Registra histogramas de latência por ferramenta, por comando SQL e por chamada ao LLM,
+# o tempo para obter uma conexão do pool, as linhas retornadas pelas queries e os tokens
+# consumidos pelo LLM. Queries acima de LIMIAR_QUERY_LENTA_MS vão para o log
+# "brainzap.queries_lentas" e para uma lista das mais recentes.
+#
+# Desligada por padrão: sem INSTRUMENTACAO=1 (ou ativar()) nenhum observador é
+# registrado em config/settings.py e callbacks() retorna uma lista vazia, então o custo é
+# só a verificação de uma variável. Este módulo não importa o driver do banco nem o
+# LangChain; eles só são carregados em ativar() e callbacks().
+#
+# Exportação no formato texto do Prometheus com exportar_prometheus() ou servindo
+# /metrics com iniciar_servidor(porta).
+
+# Carregar variáveis de ambiente (o roteador importa este módulo antes de config.settings)
+load_dotenv()
+
+INSTRUMENTACAO_ATIVA = os.getenv("INSTRUMENTACAO", "0").lower() in ("1", "true", "sim")
+LIMIAR_QUERY_LENTA_MS = float(os.getenv("LIMIAR_QUERY_LENTA_MS", "200"))
+QUERIES_LENTAS_GUARDADAS = int(os.getenv("QUERIES_LENTAS_GUARDADAS", "100"))
+# Os parâmetros das queries têm valores e descrições dos lançamentos: por padrão o log e a
+# lista de queries lentas guardam só quantos são
+QUERIES_LENTAS_PARAMS = os.getenv("QUERIES_LENTAS_PARAMS", "0").lower() in ("1", "true", "sim")
+
+# Limites (em segundos) dos baldes dos histogramas de latência
+BALDES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BALDES_LINHAS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+log_queries_lentas = logging.getLogger("brainzap.queries_lentas")
+
+_ativa = False
+_lock = threading.Lock()
+
+
+class Histograma:
+    def __init__(self, baldes: tuple):
+        self.baldes = baldes
+        self.contagens = [0] * (len(baldes) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float):
+        posicao = bisect.bisect_left(self.baldes, valor)
+        with self._lock:
+            self.contagens[posicao] += 1
+            self.soma += valor
+            self.total += 1
+
+    # Valor aproximado do percentil (limite superior do balde onde ele cai)
+    def percentil(self, p: float) -> float:
+        with self._lock:
+            contagens, total = list(self.contagens), self.total
+        if not total:
+            return 0.0
+        alvo, acumulado = total * p / 100, 0
+        for limite, contagem in zip(self.baldes + (float("inf"),), contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return float("inf")
+
+
+# Métricas do processo: histogramas e contadores identificados por nome e rótulos
+class Metricas:
+    def __init__(self):
+        self.histogramas = {}
+        self.contadores = {}
+        self.textos_sql = {}
+        self.queries_lentas = deque(maxlen=QUERIES_LENTAS_GUARDADAS)
+        self._lock = threading.Lock()
+
+    def observar(self, nome: str, valor: float, baldes: tuple = BALDES_LATENCIA, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        histograma = self.histogramas.get(chave)
+        if histograma is None:
+            with self._lock:
+                histograma = self.histogramas.setdefault(chave, Histograma(baldes))
+        histograma.observar(valor)
+
+    def incrementar(self, nome: str, quantidade: float = 1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + quantidade
+
+    def limpar(self):
+        with self._lock:
+            self.histogramas.clear()
+            self.contadores.clear()
+            self.textos_sql.clear()
+            self.queries_lentas.clear()
+
+
+metricas = Metricas()
+
+AJUDA = {
+    "brainzap_sql_duracao_segundos": "Duração de cada comando SQL executado por executar_query.",
+    "brainzap_sql_linhas": "Linhas retornadas (ou afetadas) por comando SQL.",
+    "brainzap_conexao_espera_segundos": "Tempo para obter uma conexão do pool.",
+    "brainzap_ferramenta_duracao_segundos": "Duração de cada chamada de ferramenta.",
+    "brainzap_ferramenta_erros_total": "Chamadas de ferramenta que terminaram em exceção.",
+    "brainzap_llm_duracao_segundos": "Duração de cada chamada ao LLM.",
+    "brainzap_llm_tokens_total": "Tokens consumidos pelo LLM.",
+    "brainzap_sql_lentas_total": "Comandos SQL acima do limiar de query lenta.",
+}
+
+
+def ativa() -> bool:
+    return _ativa
+
+
+# Identificador estável de um comando SQL (o mesmo usado nos prepared statements)
+def nome_sql(query: str) -> str:
+    return "q_" + hashlib.md5(query.encode()).hexdigest()[:16]
+
+
+def _observar_query(query: str, params: tuple, duracao: float, linhas: int):
+    nome = nome_sql(query)
+    if nome not in metricas.textos_sql:
+        metricas.textos_sql[nome] = " ".join(query.split())
+    metricas.observar("brainzap_sql_duracao_segundos", duracao, query=nome)
+    if linhas is not None and linhas >= 0:
+        metricas.observar("brainzap_sql_linhas", linhas, BALDES_LINHAS, query=nome)
+    if duracao * 1000 >= LIMIAR_QUERY_LENTA_MS:
+        metricas.incrementar("brainzap_sql_lentas_total", query=nome)
+        quantidade = len(params) if params else 0
+        registro = {"query": metricas.textos_sql[nome], "quantidade_params": quantidade,
+                    "duracao_ms": duracao * 1000, "linhas": linhas, "momento": time.time()}
+        if QUERIES_LENTAS_PARAMS:
+            registro["params"] = params
+            log_queries_lentas.warning("Query lenta (%.1f ms, %s linhas): %s | params=%r",
+                                       duracao * 1000, linhas, metricas.textos_sql[nome], params)
+        else:
+            log_queries_lentas.warning("Query lenta (%.1f ms, %s linhas): %s | %d parâmetros",
+                                       duracao * 1000, linhas, metricas.textos_sql[nome], quantidade)
+        metricas.queries_lentas.append(registro)
+
+
+def _observar_conexao(duracao: float):
+    metricas.observar("brainzap_conexao_espera_segundos", duracao)
+
+
+def registrar_ferramenta(nome: str, duracao: float, erro: bool = False):
+    metricas.observar("brainzap_ferramenta_duracao_segundos", duracao, ferramenta=nome)
+    if erro:
+        metricas.incrementar("brainzap_ferramenta_erros_total", ferramenta=nome)
+
+
+def registrar_llm(duracao: float, modelo: str = "", tokens_entrada: int = 0, tokens_saida: int = 0):
+    metricas.observar("brainzap_llm_duracao_segundos", duracao, modelo=modelo)
+    if tokens_entrada:
+        metricas.incrementar("brainzap_llm_tokens_total", tokens_entrada, modelo=modelo, tipo="entrada")
+    if tokens_saida:
+        metricas.incrementar("brainzap_llm_tokens_total", tokens_saida, modelo=modelo, tipo="saida")
+
+
+# Liga a instrumentação: registra os observadores de query e de conexão em config/settings.py
+def ativar(limiar_query_lenta_ms: float = None):
+    global _ativa, LIMIAR_QUERY_LENTA_MS
+    from config.settings import adicionar_observador, adicionar_observador_conexao
+
+    with _lock:
+        if limiar_query_lenta_ms is not None:
+            LIMIAR_QUERY_LENTA_MS = limiar_query_lenta_ms
+        if not _ativa:
+            adicionar_observador(_observar_query)
+            adicionar_observador_conexao(_observar_conexao)
+            _ativa = True
+
+
+def desativar():
+    global _ativa
+    from config.settings import remover_observador, remover_observador_conexao
+
+    with _lock:
+        remover_observador(_observar_query)
+        remover_observador_conexao(_observar_conexao)
+        _ativa = False
+
+
+_classe_callback = None
+
+
+# Cria (uma vez) o callback do LangChain que mede LLM e ferramentas do orquestrador
+def _callback():
+    global _classe_callback
+    if _classe_callback is not None:
+        return _classe_callback
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class CallbackInstrumentacao(BaseCallbackHandler):
+        def __init__(self):
+            self._inicios = {}
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._inicios[run_id] = (time.perf_counter(), (serialized or {}).get("name", ""))
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._inicios[run_id] = (time.perf_counter(), (serialized or {}).get("name", ""))
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            inicio, modelo = self._inicios.pop(run_id, (None, ""))
+            if inicio is None:
+                return
+            uso = (response.llm_output or {}).get("token_usage") or {}
+            entrada, saida = uso.get("prompt_tokens", 0), uso.get("completion_tokens", 0)
+            if not uso:
+                for geracoes in response.generations:
+                    for geracao in geracoes:
+                        metadados = getattr(getattr(geracao, "message", None), "usage_metadata", None) or {}
+                        entrada += metadados.get("input_tokens", 0)
+                        saida += metadados.get("output_tokens", 0)
+            modelo = (response.llm_output or {}).get("model_name", modelo)
+            registrar_llm(time.perf_counter() - inicio, modelo, entrada, saida)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            inicio, modelo = self._inicios.pop(run_id, (None, ""))
+            if inicio is not None:
+                registrar_llm(time.perf_counter() - inicio, modelo)
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            self._inicios[run_id] = (time.perf_counter(), (serialized or {}).get("name", ""))
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            inicio, nome = self._inicios.pop(run_id, (None, ""))
+            if inicio is not None:
+                registrar_ferramenta(nome, time.perf_counter() - inicio)
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            inicio, nome = self._inicios.pop(run_id, (None, ""))
+            if inicio is not None:
+                registrar_ferramenta(nome, time.perf_counter() - inicio, erro=True)
+
+    _classe_callback = CallbackInstrumentacao
+    return _classe_callback
+
+
+# Callbacks para passar ao orquestrador (ex.: agente.run(texto, callbacks=callbacks())).
+# Com a instrumentação desligada retorna uma lista vazia.
+def callbacks() -> list:
+    if not _ativa:
+        return []
+    return [_callback()()]
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos: tuple, extra: str = "") -> str:
+    partes = [f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+# Métricas no formato texto do Prometheus
+def exportar_prometheus() -> str:
+    linhas, tipos_escritos = [], set()
+
+    def cabecalho(nome: str, tipo: str):
+        if nome not in tipos_escritos:
+            tipos_escritos.add(nome)
+            if nome in AJUDA:
+                linhas.append(f"# HELP {nome} {AJUDA[nome]}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+    for (nome, rotulos), histograma in sorted(metricas.histogramas.items()):
+        cabecalho(nome, "histogram")
+        with histograma._lock:
+            contagens, soma, total = list(histograma.contagens), histograma.soma, histograma.total
+        acumulado = 0
+        for limite, contagem in zip(histograma.baldes + (float("inf"),), contagens):
+            acumulado += contagem
+            le = "+Inf" if limite == float("inf") else repr(limite)
+            rotulo_le = f'le="{le}"'
+            linhas.append(f"{nome}_bucket{_rotulos(rotulos, rotulo_le)} {acumulado}")
+        linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma}")
+        linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+
+    for (nome, rotulos), valor in sorted(metricas.contadores.items()):
+        cabecalho(nome, "counter")
+        linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+
+    # Texto de cada query, para relacionar o rótulo query="q_..." ao SQL
+    for nome, texto in sorted(metricas.textos_sql.items()):
+        linhas.append(f"# {nome}: {texto[:300]}")
+    return "\n".join(linhas) + "\n"
+
+
+# Resumo legível: p50/p99 aproximados de cada histograma e as queries lentas recentes
+def resumo() -> dict:
+    return {
+        "histogramas": {
+            f"{nome}{_rotulos(rotulos)}": {"n": h.total, "media": h.soma / h.total if h.total else 0.0,
+                                           "p50": h.percentil(50), "p99": h.percentil(99)}
+            for (nome, rotulos), h in sorted(metricas.histogramas.items())
+        },
+        "contadores": {f"{nome}{_rotulos(rotulos)}": valor for (nome, rotulos), valor in sorted(metricas.contadores.items())},
+        "queries_lentas": list(metricas.queries_lentas),
+    }
+
+
+# Serve /metrics no formato do Prometheus em uma thread (http.server da biblioteca padrão)
+def iniciar_servidor(porta: int = 9464, endereco: str = "0.0.0.0"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class RotaMetricas(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            corpo = exportar_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), RotaMetricas)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="brainzap-metricas").start()
+    return servidor
+
+
+if INSTRUMENTACAO_ATIVA:
+    ativar()
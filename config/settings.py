@@ -1,5 +1,10 @@
 import os
-import psycopg2
+import re
+import threading
+import time
+import hashlib
+import sqlite3
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -8,41 +13,359 @@ load_dotenv()
 # API Key da OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Função para conectar ao banco de dados PostgreSQL
+# Tamanho do pool de conexões (mínimo de conexões abertas e máximo simultâneo)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# Executa um "SELECT 1" ao retirar uma conexão do pool para descartar conexões mortas
+DB_POOL_PING = os.getenv("DB_POOL_PING", "1").lower() not in ("0", "false", "nao", "não")
+# Tempo máximo (em segundos) esperando uma conexão livre quando o pool está cheio
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Bancos suportados: "postgres" (servidor) ou "sqlite" (arquivo local, ver config/banco_sqlite.py)
+DB_BACKENDS = ("postgres", "sqlite")
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_vagas = threading.BoundedSemaphore(DB_POOL_MAX)
+
+# Estados de transação de get_transaction_status() (os valores de psycopg2.extensions)
+TRANSACAO_OCIOSA = 0
+TRANSACAO_ABERTA = 2
+TRANSACAO_COM_ERRO = 3
+
+# Erros que indicam que a conexão caiu (ex.: reinício do servidor) e pode ser refeita,
+# e o erro do pool ao devolver uma conexão de um pool fechado. Preenchidos por _psycopg2().
+_ERROS_CONEXAO = ()
+_ERRO_POOL = ()
+_ConexaoPreparada = None
+
+
+# Importa o psycopg2 apenas com o backend PostgreSQL; o SQLite não precisa do driver
+def _psycopg2():
+    global _ERROS_CONEXAO, _ERRO_POOL
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+
+    _ERROS_CONEXAO = (psycopg2.OperationalError, psycopg2.InterfaceError)
+    _ERRO_POOL = psycopg2.pool.PoolError
+    return psycopg2
+
+
+# Conexão que guarda os nomes dos prepared statements já criados nela
+def _classe_conexao_preparada():
+    global _ConexaoPreparada
+    if _ConexaoPreparada is None:
+        psycopg2 = _psycopg2()
+
+        class ConexaoPreparada(psycopg2.extensions.connection):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.preparadas = set()
+
+        _ConexaoPreparada = ConexaoPreparada
+    return _ConexaoPreparada
+
+
+# Banco escolhido no .env (DB_BACKEND); lido a cada chamada para respeitar um --env carregado depois
+def backend() -> str:
+    nome = os.getenv("DB_BACKEND", "postgres").strip().lower()
+    if nome not in DB_BACKENDS:
+        raise ValueError(f"DB_BACKEND inválido: '{nome}'. Use um de: {', '.join(DB_BACKENDS)}.")
+    return nome
+
+
+# Arquivo do banco SQLite: DB_PATH ou, por padrão, "<DB_NAME>.db"
+def _caminho_sqlite() -> str:
+    return os.getenv("DB_PATH") or f"{os.getenv('DB_NAME') or 'brainzap'}.db"
+
+
+# Função para conectar ao banco de dados (PostgreSQL ou o arquivo SQLite)
 def conectar_db():
     try:
+        if backend() == "sqlite":
+            from config import banco_sqlite
+
+            return banco_sqlite.conectar(_caminho_sqlite(), DB_POOL_TIMEOUT)
         # Obtém as variáveis de ambiente para conectar ao banco de dados
-        conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),  # Nome do banco de dados
-            user=os.getenv("USER"),  # Seu usuário PostgreSQL
-            password=os.getenv("PASSWORD_DB"),  # Sua senha do PostgreSQL
-            host=os.getenv("DB_HOST", "localhost"),  # Host do banco de dados (localhost por padrão)
-            port=os.getenv("DB_PORT", "5432")  # Porta do PostgreSQL (5432 por padrão)
-        )
+        conn = _psycopg2().connect(**_parametros_conexao())
         return conn
     except Exception as e:
         print(f"Erro ao conectar ao banco de dados: {e}")
         return None
 
-# Função para executar consultas no banco de dados
-def executar_query(query: str, params: tuple = ()) -> tuple:
-    conn = conectar_db()
-    if conn is None:
-        return "Erro ao conectar ao banco de dados.", None
 
+def _parametros_conexao() -> dict:
+    return dict(
+        dbname=os.getenv("DB_NAME"),  # Nome do banco de dados
+        user=os.getenv("USER"),  # Seu usuário PostgreSQL
+        password=os.getenv("PASSWORD_DB"),  # Sua senha do PostgreSQL
+        host=os.getenv("DB_HOST", "localhost"),  # Host do banco de dados (localhost por padrão)
+        port=os.getenv("DB_PORT", "5432"),  # Porta do PostgreSQL (5432 por padrão)
+        connection_factory=_classe_conexao_preparada(),
+    )
+
+
+# Retorna o pool de conexões do processo, criando-o na primeira chamada
+def obter_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _criar_pool()
+    return _pool
+
+
+def _criar_pool():
+    if backend() == "sqlite":
+        from config import banco_sqlite
+
+        return banco_sqlite.PoolSqlite(DB_POOL_MIN, DB_POOL_MAX, _caminho_sqlite(), DB_POOL_TIMEOUT)
+    return _psycopg2().pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **_parametros_conexao())
+
+
+# Fecha todas as conexões do pool (ex.: antes de um fork ou ao encerrar o processo)
+def fechar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def _conexao_saudavel(conn) -> bool:
+    if conn.closed:
+        return False
+    if not DB_POOL_PING:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    except _ERROS_CONEXAO:
+        return False
+
+
+# Indica se o erro derrubou a conexão (e não apenas a query)
+def _conexao_perdida(conn, erro: Exception) -> bool:
+    return isinstance(erro, _ERROS_CONEXAO) and bool(conn.closed)
+
+
+# Funções chamadas após cada query com (query, params, duracao_em_segundos, linhas) e
+# após cada retirada de conexão do pool com (duracao_em_segundos).
+# Usadas por benchmarks e instrumentação; sem observadores não há custo extra.
+_observadores = []
+_observadores_conexao = []
+
+
+def adicionar_observador(funcao):
+    _observadores.append(funcao)
+
+
+def remover_observador(funcao):
+    if funcao in _observadores:
+        _observadores.remove(funcao)
+
+
+def adicionar_observador_conexao(funcao):
+    _observadores_conexao.append(funcao)
+
+
+def remover_observador_conexao(funcao):
+    if funcao in _observadores_conexao:
+        _observadores_conexao.remove(funcao)
+
+
+# Retira uma conexão saudável do pool, descartando as que caíram.
+# Quando todas estão em uso, espera até DB_POOL_TIMEOUT segundos por uma livre.
+# O tempo de espera é informado aos observadores de conexão, se houver.
+def _retirar_conexao():
+    if _observadores_conexao:
+        inicio = time.perf_counter()
+        conn = _retirar_conexao_do_pool()
+        duracao = time.perf_counter() - inicio
+        for observador in list(_observadores_conexao):
+            observador(duracao)
+        return conn
+    return _retirar_conexao_do_pool()
+
+
+def _retirar_conexao_do_pool():
+    pool = obter_pool()
+    if not _pool_vagas.acquire(timeout=DB_POOL_TIMEOUT):
+        raise TimeoutError("Tempo esgotado aguardando uma conexão livre no pool.")
     try:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        if query.strip().upper().startswith("SELECT"):
-            result = cursor.fetchall()
+        for _ in range(DB_POOL_MAX + 1):
+            conn = pool.getconn()
+            if _conexao_saudavel(conn):
+                return conn
+            pool.putconn(conn, close=True)
+        raise ConnectionError("Nenhuma conexão saudável disponível no pool.")
+    except Exception:
+        _pool_vagas.release()
+        raise
+
+
+def _devolver_conexao(conn, descartar: bool = False):
+    pool = obter_pool()
+    try:
+        if descartar or conn.closed:
+            pool.putconn(conn, close=True)
+            return
+        if conn.get_transaction_status() != TRANSACAO_OCIOSA:
+            conn.rollback()
+        pool.putconn(conn)
+    except _ERRO_POOL:
+        # A conexão pertence a um pool já fechado por fechar_pool()
+        conn.close()
+    finally:
+        _pool_vagas.release()
+
+
+# Abre uma transação em uma conexão do pool. Consultas feitas com
+# executar_query(..., conn=conn) compartilham a conexão e são confirmadas
+# juntas ao sair do bloco (ou desfeitas se houver erro).
+@contextmanager
+def transacao():
+    conn = _retirar_conexao()
+    descartar = False
+    try:
+        yield conn
+        if conn.get_transaction_status() == TRANSACAO_COM_ERRO:
+            conn.rollback()
         else:
             conn.commit()
-            result = None
-        cursor.close()
-        return None, result
     except Exception as e:
-        print(f"Erro ao executar query: {e}")
-        return f"Erro ao executar query: {e}", None
+        descartar = _conexao_perdida(conn, e)
+        if not descartar:
+            conn.rollback()
+        raise
     finally:
-        if conn:
-            conn.close()
+        _devolver_conexao(conn, descartar)
+
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+# Executa a query como prepared statement, preparando-a na conexão se ainda não foi
+def _executar_preparada(conn, cursor, query: str, params: tuple):
+    nome = "q_" + hashlib.md5(query.encode()).hexdigest()[:16]
+    if nome not in conn.preparadas:
+        contador = iter(range(1, len(params) + 1))
+        sql = _PLACEHOLDER.sub(lambda _: f"${next(contador)}", query)
+        cursor.execute(f"PREPARE {nome} AS {sql}")
+        conn.preparadas.add(nome)
+    if params:
+        cursor.execute(f"EXECUTE {nome} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cursor.execute(f"EXECUTE {nome}")
+
+
+def _executar(conn, query: str, params: tuple, preparar: bool):
+    inicio = time.perf_counter() if _observadores else 0
+    with conn.cursor() as cursor:
+        # No SQLite o próprio sqlite3 guarda os comandos compilados de cada conexão
+        if preparar and not isinstance(conn, sqlite3.Connection):
+            _executar_preparada(conn, cursor, query, params)
+        else:
+            cursor.execute(query, params)
+        result = cursor.fetchall() if cursor.description is not None else None
+    if _observadores:
+        duracao = time.perf_counter() - inicio
+        linhas = len(result) if result is not None else cursor.rowcount
+        for observador in list(_observadores):
+            observador(query, params, duracao, linhas)
+    return result
+
+
+# Função para executar consultas no banco de dados
+# preparar=True usa prepared statements (para SQL fixo executado com frequência).
+# Com conn (vinda de transacao()) a query roda na transação aberta, sem commit.
+def executar_query(query: str, params: tuple = (), preparar: bool = False, conn=None) -> tuple:
+    if conn is not None:
+        try:
+            return None, _executar(conn, query, params, preparar)
+        except Exception as e:
+            print(f"Erro ao executar query: {e}")
+            return f"Erro ao executar query: {e}", None
+
+    # Se a conexão cair antes do commit (ex.: servidor reiniciado), tenta de novo com outra conexão
+    for tentativa in range(2):
+        try:
+            conn = _retirar_conexao()
+        except Exception as e:
+            print(f"Erro ao conectar ao banco de dados: {e}")
+            return "Erro ao conectar ao banco de dados.", None
+
+        descartar = False
+        try:
+            try:
+                result = _executar(conn, query, params, preparar)
+            except _ERROS_CONEXAO as e:
+                descartar = _conexao_perdida(conn, e)
+                if descartar and tentativa == 0:
+                    continue
+                raise
+            conn.commit()
+            return None, result
+        except Exception as e:
+            descartar = descartar or _conexao_perdida(conn, e)
+            print(f"Erro ao executar query: {e}")
+            return f"Erro ao executar query: {e}", None
+        finally:
+            _devolver_conexao(conn, descartar)
+
+
+# Lê o resultado de uma query aos poucos, com um cursor nomeado (do lado do servidor; no
+# SQLite, um cursor comum, que também busca as linhas sob demanda):
+# só tamanho_lote linhas ficam na memória por vez. É um gerador, então a conexão fica
+# presa ao iterador até ele terminar ou ser fechado; erros são levantados como exceção.
+def iterar_query(query: str, params: tuple = (), tamanho_lote: int = 1000):
+    inicio, linhas = time.perf_counter(), 0
+    with transacao() as conn:
+        with conn.cursor(name="iterar_query") as cursor:
+            cursor.itersize = tamanho_lote
+            cursor.execute(query, params)
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                linhas += len(lote)
+                yield from lote
+    if _observadores:
+        duracao = time.perf_counter() - inicio
+        for observador in list(_observadores):
+            observador(query, params, duracao, linhas)
+
+
+# Executa um INSERT em lote com psycopg2.extras.execute_values.
+# A query deve ter um único "VALUES %s", ex.: "INSERT INTO gastos (valor, data) VALUES %s".
+# Cada página de tamanho_pagina linhas vira um único INSERT de várias linhas.
+# No SQLite o "VALUES %s" vira uma linha de placeholders executada com executemany.
+def _inserir_lote(conn, query: str, linhas: list, tamanho_pagina: int):
+    with conn.cursor() as cursor:
+        if not isinstance(conn, sqlite3.Connection):
+            _psycopg2().extras.execute_values(cursor, query, linhas, page_size=tamanho_pagina)
+        else:
+            valores = "VALUES (" + ", ".join(["%s"] * len(linhas[0])) + ")"
+            cursor.executemany(query.replace("VALUES %s", valores, 1), linhas)
+
+
+def executar_lote(query: str, linhas: list, tamanho_pagina: int = 1000, conn=None) -> tuple:
+    if not linhas:
+        return None, None
+    if conn is not None:
+        try:
+            _inserir_lote(conn, query, linhas, tamanho_pagina)
+            return None, None
+        except Exception as e:
+            print(f"Erro ao executar lote: {e}")
+            return f"Erro ao executar lote: {e}", None
+
+    try:
+        with transacao() as conn:
+            _inserir_lote(conn, query, linhas, tamanho_pagina)
+        return None, None
+    except Exception as e:
+        print(f"Erro ao executar lote: {e}")
+        return f"Erro ao executar lote: {e}", None
@@ -1,30 +1,80 @@
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.agents import initialize_agent, AgentType
-from agents.financeiro import agente_financeiro
-from agents.agenda import agente_agenda
-from agents.trabalho import agente_trabalho
-from agents.pesquisa import agente_pesquisa
-
-# Carregar variáveis do .env
-load_dotenv()
-chave_api = os.getenv("OPENAI_API_KEY")
+import threading
+from agents.registro import ferramentas_langchain
+
+# O modelo, o LangChain e os módulos dos subagentes só são carregados quando o
+# orquestrador é usado pela primeira vez, então importar este módulo é barato.
+
+_orquestrador = None
+_lock = threading.Lock()
+
 
 # Criar o modelo de IA
-modelo = ChatOpenAI(model="gpt-4o-mini", api_key=chave_api)
+def criar_modelo():
+    from dotenv import load_dotenv
+    from langchain_openai import ChatOpenAI
+
+    # Carregar variáveis do .env
+    load_dotenv()
+    chave_api = os.getenv("OPENAI_API_KEY")
+    return ChatOpenAI(model="gpt-4o-mini", api_key=chave_api)
+
+
+# Criar o agente orquestrador com as ferramentas de todos os agentes.
+# llm permite usar outro modelo (ex.: um modelo falso em testes e benchmarks).
+# modo "react" (padrão) usa o agente ZERO_SHOT_REACT_DESCRIPTION, uma ferramenta por passo;
+# modo "paralelo" deixa o modelo pedir várias ferramentas por passo e as executa ao mesmo
+# tempo (orquestrador.py). Sem modo, usa ORQUESTRADOR_MODO do .env.
+def criar_orquestrador(llm=None, verbose: bool = True, modo: str = None, ferramentas: list = None):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    modo = modo or os.getenv("ORQUESTRADOR_MODO", "react")
+    ferramentas = ferramentas if ferramentas is not None else ferramentas_langchain()
+    llm = llm if llm is not None else criar_modelo()
+
+    if modo == "paralelo":
+        from orquestrador import OrquestradorParalelo
+        return OrquestradorParalelo(llm, ferramentas, verbose=verbose)
+    if modo != "react":
+        raise ValueError("Modo de orquestrador inválido. Use 'react' ou 'paralelo'.")
+
+    from langchain.agents import initialize_agent, AgentType
+
+    return initialize_agent(
+        tools=ferramentas,
+        llm=llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=verbose
+    )
+
+
+# Retorna o orquestrador do processo, criando-o no primeiro uso
+def obter_orquestrador():
+    global _orquestrador
+    if _orquestrador is None:
+        with _lock:
+            if _orquestrador is None:
+                _orquestrador = criar_orquestrador()
+    return _orquestrador
+
+
+# Mantém os nomes antigos (agente_orquestrador, todos_os_agentes) sem criá-los na importação
+def __getattr__(nome):
+    if nome == "agente_orquestrador":
+        return obter_orquestrador()
+    if nome == "todos_os_agentes":
+        return ferramentas_langchain()
+    raise AttributeError(nome)
+
 
-# Juntar as ferramentas de todos os agentes em uma única lista
-todos_os_agentes = agente_financeiro + agente_agenda + agente_trabalho + agente_pesquisa
+# Responde a um pedido: comandos conhecidos vão direto para a ferramenta (roteador.py),
+# o restante passa pelo orquestrador.
+def responder(pergunta: str) -> str:
+    from roteador import responder as responder_roteado
+    return responder_roteado(pergunta)
 
-# Criar o agente orquestrador
-agente_orquestrador = initialize_agent(
-    tools=todos_os_agentes,
-    llm=modelo,
-    agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True
-)
 
 if __name__ == "__main__":
-    resposta = agente_orquestrador.run("Adicione um evento na agenda: Reunião com cliente amanhã às 10h.")
+    resposta = responder("Adicione um evento na agenda: Reunião com cliente amanhã às 10h.")
     print(resposta)
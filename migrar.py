@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+from datetime import date
+from dotenv import load_dotenv
+from config.settings import backend, executar_query, transacao
+from agents.consolidacao import TABELA as TABELA_CONSOLIDADO
+
+# Migrações versionadas do banco de dados.
+#
+# Uso:
+#   python migrar.py                      # aplica as migrações pendentes
+#   python migrar.py aplicar --particionar # também converte gastos e receitas em partições mensais
+#   python migrar.py status               # mostra o que já foi aplicado
+#   python migrar.py particoes --meses 3  # cria as partições dos próximos meses
+#   python migrar.py --env .env.teste     # usa outro banco (ex.: o banco local de testes)
+#
+# Cada migração roda em uma transação e é registrada na tabela schema_migracoes junto
+# com o checksum do seu SQL, então rodar o script de novo não repete nada. Um lock
+# consultivo impede que duas execuções simultâneas apliquem a mesma migração.
+#
+# Com DB_BACKEND=sqlite as mesmas migrações criam o esquema no arquivo local (o SQL é
+# traduzido por config/banco_sqlite.py); o particionamento existe apenas no PostgreSQL.
+
+# Partições mensais criadas à frente do mês atual
+MESES_FUTUROS = 3
+
+# Número usado no pg_advisory_xact_lock das migrações
+LOCK_MIGRACOES = 872301
+
+TABELA_MIGRACOES = """
+    CREATE TABLE IF NOT EXISTS schema_migracoes (
+        versao INTEGER PRIMARY KEY,
+        nome VARCHAR(255) NOT NULL,
+        checksum VARCHAR(32) NOT NULL,
+        aplicada_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+TABELAS = """
+    CREATE TABLE IF NOT EXISTS gastos (
+        id SERIAL PRIMARY KEY,
+        valor NUMERIC(10, 2) NOT NULL,
+        categoria VARCHAR(255) NOT NULL,
+        sub_categoria VARCHAR(255),
+        descricao VARCHAR(500),
+        data TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS receitas (
+        id SERIAL PRIMARY KEY,
+        valor NUMERIC(10, 2) NOT NULL,
+        categoria VARCHAR(255),
+        sub_categoria VARCHAR(255),
+        data TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS orcamentos (
+        id SERIAL PRIMARY KEY,
+        categoria VARCHAR(255) NOT NULL,
+        sub_categoria VARCHAR(255),
+        limite NUMERIC(10, 2) NOT NULL,
+        data_inicio TIMESTAMP,
+        data_fim TIMESTAMP,
+        CONSTRAINT orcamentos_categoria_sub_categoria_key UNIQUE (categoria, sub_categoria)
+    );
+"""
+
+# Preenche o consolidado a partir do histórico quando ele acaba de ser criado (vazio)
+PREENCHER_CONSOLIDADO = """
+    INSERT INTO consolidado_diario (dia, tipo, categoria, sub_categoria, total, quantidade)
+    SELECT DATE(data), 'gasto', categoria, COALESCE(sub_categoria, ''), SUM(valor), COUNT(*)
+    FROM gastos
+    WHERE data IS NOT NULL AND NOT EXISTS (SELECT 1 FROM consolidado_diario)
+    GROUP BY 1, 2, 3, 4
+    UNION ALL
+    SELECT DATE(data), 'receita', COALESCE(categoria, ''), COALESCE(sub_categoria, ''), SUM(valor), COUNT(*)
+    FROM receitas
+    WHERE data IS NOT NULL AND NOT EXISTS (SELECT 1 FROM consolidado_diario)
+    GROUP BY 1, 2, 3, 4
+"""
+
+# Índices usados pelas consultas de agents/financeiro.py e agents/consultas.py:
+# - (categoria, sub_categoria, data) para o histórico e os totais de uma categoria;
+# - BRIN em data para os filtros de período, pequeno e barato de manter em tabelas
+#   onde os lançamentos chegam em ordem aproximada de data.
+INDICES = """
+    CREATE INDEX IF NOT EXISTS gastos_categoria_sub_categoria_data_idx ON gastos (categoria, sub_categoria, data);
+    CREATE INDEX IF NOT EXISTS gastos_data_brin_idx ON gastos USING brin (data);
+    CREATE INDEX IF NOT EXISTS receitas_data_brin_idx ON receitas USING brin (data);
+"""
+
+
+def _tabela_particionada(conn, tabela: str) -> bool:
+    erro, result = executar_query(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+        (tabela,), conn=conn,
+    )
+    if erro:
+        raise RuntimeError(erro)
+    return bool(result)
+
+
+def _inicio_mes(dia: date, deslocamento: int = 0) -> date:
+    meses = dia.year * 12 + dia.month - 1 + deslocamento
+    return date(meses // 12, meses % 12 + 1, 1)
+
+
+# Cria (se ainda não existirem) as partições mensais de tabela entre os meses de inicio e fim.
+# Se o mês já tem lançamentos na partição padrão (ex.: o comando "particoes" deixou de
+# rodar), o PostgreSQL recusa criar a partição; nesse caso a partição padrão é desanexada,
+# a do mês é criada, as linhas do mês são movidas para ela e a padrão é anexada de volta,
+# tudo na transação de conn (a tabela fica bloqueada até o commit).
+def criar_particoes(conn, tabela: str, inicio: date, fim: date):
+    def executar(query: str, params: tuple = ()):
+        erro, result = executar_query(query, params, conn=conn)
+        if erro:
+            raise RuntimeError(erro)
+        return result
+
+    padrao = f"{tabela}_padrao"
+    tem_padrao = executar("SELECT to_regclass(%s) IS NOT NULL", (padrao,))[0][0]
+    mes = _inicio_mes(inicio)
+    while mes <= fim:
+        proximo = _inicio_mes(mes, 1)
+        particao = f"{tabela}_p{mes:%Y_%m}"
+        limites = f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{proximo.isoformat()}')"
+        if executar("SELECT to_regclass(%s) IS NOT NULL", (particao,))[0][0]:
+            mes = proximo
+            continue
+        no_mes = "WHERE data >= %s AND data < %s"
+        if tem_padrao and executar(f"SELECT EXISTS (SELECT 1 FROM {padrao} {no_mes})", (mes, proximo))[0][0]:
+            executar(f"ALTER TABLE {tabela} DETACH PARTITION {padrao}")
+            executar(f"CREATE TABLE {particao} PARTITION OF {tabela} {limites}")
+            executar(f"INSERT INTO {particao} SELECT * FROM {padrao} {no_mes}", (mes, proximo))
+            executar(f"DELETE FROM {padrao} {no_mes}", (mes, proximo))
+            executar(f"ALTER TABLE {tabela} ATTACH PARTITION {padrao} DEFAULT")
+        else:
+            executar(f"CREATE TABLE {particao} PARTITION OF {tabela} {limites}")
+        mes = proximo
+
+
+# Converte uma tabela de lançamentos em uma tabela particionada por mês (RANGE em data).
+# A chave primária passa a ser (id, data), exigência do PostgreSQL para tabelas particionadas.
+def _particionar_tabela(conn, tabela: str):
+    def executar(query: str, params: tuple = ()):
+        erro, result = executar_query(query, params, conn=conn)
+        if erro:
+            raise RuntimeError(erro)
+        return result
+
+    if _tabela_particionada(conn, tabela):
+        return
+    if executar(f"SELECT COUNT(*) FROM {tabela} WHERE data IS NULL")[0][0]:
+        raise RuntimeError(f"A tabela {tabela} tem lançamentos sem data; preencha a coluna data antes de particionar.")
+
+    sequencia = executar("SELECT pg_get_serial_sequence(%s, 'id')", (tabela,))[0][0]
+    primeiro, = executar(f"SELECT MIN(data) FROM {tabela}")[0]
+    hoje = date.today()
+
+    executar(f"ALTER TABLE {tabela} RENAME TO {tabela}_antiga")
+    executar(f"CREATE TABLE {tabela} (LIKE {tabela}_antiga INCLUDING DEFAULTS) PARTITION BY RANGE (data)")
+    executar(f"ALTER TABLE {tabela} ALTER COLUMN data SET NOT NULL")
+    executar(f"CREATE TABLE {tabela}_padrao PARTITION OF {tabela} DEFAULT")
+    criar_particoes(conn, tabela, primeiro.date() if primeiro else hoje, _inicio_mes(hoje, MESES_FUTUROS))
+    executar(f"INSERT INTO {tabela} SELECT * FROM {tabela}_antiga")
+    if sequencia:
+        executar(f"ALTER SEQUENCE {sequencia} OWNED BY {tabela}.id")
+    executar(f"DROP TABLE {tabela}_antiga")
+    executar(f"ALTER TABLE {tabela} ADD PRIMARY KEY (id, data)")
+
+
+def _particionar(conn):
+    if backend() == "sqlite":
+        raise RuntimeError("O particionamento de tabelas existe apenas no PostgreSQL.")
+    for tabela in ("gastos", "receitas"):
+        _particionar_tabela(conn, tabela)
+    # Os índices da tabela antiga foram removidos com ela; recria no pai particionado
+    erro, _ = executar_query(INDICES, conn=conn)
+    if erro:
+        raise RuntimeError(erro)
+
+
+# (versão, nome, SQL ou função que recebe a conexão)
+MIGRACOES = [
+    (1, "tabelas", TABELAS),
+    (2, "consolidado_diario", TABELA_CONSOLIDADO + ";\n" + PREENCHER_CONSOLIDADO),
+    (3, "indices", INDICES),
+]
+
+# Migrações aplicadas apenas quando pedidas explicitamente
+OPCIONAIS = {
+    "particionar": (4, "particionar gastos e receitas por mês", _particionar),
+}
+
+
+# O checksum de uma migração em Python é calculado sobre o nome da função
+def _checksum(migracao) -> str:
+    conteudo = migracao.__qualname__ if callable(migracao) else migracao
+    return hashlib.md5(conteudo.encode()).hexdigest()
+
+
+def _migracoes_aplicadas(conn) -> dict:
+    erro, _ = executar_query(TABELA_MIGRACOES, conn=conn)
+    if not erro:
+        erro, result = executar_query("SELECT versao, nome, checksum, aplicada_em FROM schema_migracoes", conn=conn)
+    if erro:
+        raise RuntimeError(erro)
+    return {versao: (nome, checksum, aplicada_em) for versao, nome, checksum, aplicada_em in result}
+
+
+def _aplicar_migracao(versao: int, nome: str, migracao) -> str:
+    with transacao() as conn:
+        erro, _ = executar_query("SELECT pg_advisory_xact_lock(%s)", (LOCK_MIGRACOES,), conn=conn)
+        if erro:
+            raise RuntimeError(erro)
+        aplicadas = _migracoes_aplicadas(conn)
+        checksum = _checksum(migracao)
+        if versao in aplicadas:
+            if aplicadas[versao][1] != checksum:
+                return f"Aviso: a migração {versao} ({nome}) mudou desde que foi aplicada."
+            return None
+
+        if callable(migracao):
+            migracao(conn)
+        else:
+            erro, _ = executar_query(migracao, conn=conn)
+            if erro:
+                raise RuntimeError(erro)
+        erro, _ = executar_query(
+            "INSERT INTO schema_migracoes (versao, nome, checksum) VALUES (%s, %s, %s)",
+            (versao, nome, checksum), conn=conn,
+        )
+        if erro:
+            raise RuntimeError(erro)
+        return f"Migração {versao} ({nome}) aplicada."
+
+
+# Garante as partições dos próximos meses nas tabelas que já estão particionadas.
+def criar_particoes_futuras(meses: int = MESES_FUTUROS) -> list:
+    criadas = []
+    if backend() == "sqlite":
+        return criadas
+    with transacao() as conn:
+        for tabela in ("gastos", "receitas"):
+            if _tabela_particionada(conn, tabela):
+                criar_particoes(conn, tabela, date.today(), _inicio_mes(date.today(), meses))
+                criadas.append(tabela)
+    return criadas
+
+
+def aplicar(particionar: bool = False) -> list:
+    migracoes = list(MIGRACOES)
+    if particionar:
+        migracoes.append(OPCIONAIS["particionar"])
+
+    mensagens = []
+    for versao, nome, migracao in sorted(migracoes, key=lambda m: m[0]):
+        try:
+            mensagem = _aplicar_migracao(versao, nome, migracao)
+        except Exception as e:
+            mensagens.append(f"Erro na migração {versao} ({nome}): {e}")
+            break
+        if mensagem:
+            mensagens.append(mensagem)
+    else:
+        try:
+            for tabela in criar_particoes_futuras():
+                mensagens.append(f"Partições futuras de {tabela} garantidas.")
+        except Exception as e:
+            mensagens.append(f"Erro ao criar as partições futuras: {e}")
+    return mensagens or ["Banco de dados já está atualizado."]
+
+
+def status() -> list:
+    with transacao() as conn:
+        aplicadas = _migracoes_aplicadas(conn)
+    linhas = []
+    for versao, nome, migracao in MIGRACOES + list(OPCIONAIS.values()):
+        if versao in aplicadas:
+            situacao = f"aplicada em {aplicadas[versao][2]:%Y-%m-%d %H:%M}"
+            if aplicadas[versao][1] != _checksum(migracao):
+                situacao += " (alterada desde então)"
+        else:
+            situacao = "opcional" if (versao, nome, migracao) in OPCIONAIS.values() else "pendente"
+        linhas.append(f"{versao:>4}  {nome}: {situacao}")
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrações do banco de dados do Brain Zap.")
+    parser.add_argument("comando", nargs="?", default="aplicar", choices=["aplicar", "status", "particoes"])
+    parser.add_argument("--env", help="Arquivo .env com as variáveis de conexão do banco a migrar.")
+    parser.add_argument("--particionar", action="store_true", help="Converte gastos e receitas em partições mensais.")
+    parser.add_argument("--meses", type=int, default=MESES_FUTUROS, help="Meses à frente para criar partições.")
+    args = parser.parse_args()
+
+    if args.env:
+        load_dotenv(args.env, override=True)
+
+    if args.comando == "status":
+        print("\n".join(status()))
+    elif args.comando == "particoes":
+        try:
+            tabelas = criar_particoes_futuras(args.meses)
+            print(f"Partições criadas para: {', '.join(tabelas)}." if tabelas else "Nenhuma tabela particionada.")
+        except Exception as e:
+            print(f"Erro ao criar as partições: {e}")
+    else:
+        print("\n".join(aplicar(args.particionar)))
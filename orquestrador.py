@@ -0,0 +1,136 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TempoEsgotado
+
+# Orquestrador com chamadas de ferramentas em paralelo.
+#
+# O agente ZERO_SHOT_REACT_DESCRIPTION executa uma ferramenta por passo do LLM, então um
+# pedido como "mostre meu saldo, o relatório mensal e meus próximos eventos" leva três
+# ciclos de pensar/agir. Aqui o modelo de chat recebe as ferramentas via bind_tools e pode
+# pedir várias chamadas na mesma resposta; elas rodam ao mesmo tempo em um pool de threads
+# limitado, cada uma com seu tempo máximo, e os resultados voltam ao modelo na ordem em
+# que foram pedidos.
+#
+# Aceita qualquer lista de ferramentas do LangChain (ex.: ferramentas_langchain() ou
+# agente_financeiro + agente_agenda + ...). Nomes com espaços e acentos são convertidos
+# para o formato aceito pelas APIs de function calling ("Saldo Disponível" ->
+# "Saldo_Disponivel"). Modelos sem bind_tools (ex.: GenericFakeChatModel em testes) são
+# usados como estão e devem devolver as tool_calls já nesses nomes.
+
+ORQUESTRADOR_TRABALHADORES = int(os.getenv("ORQUESTRADOR_TRABALHADORES", "4"))
+ORQUESTRADOR_TIMEOUT_FERRAMENTA = float(os.getenv("ORQUESTRADOR_TIMEOUT_FERRAMENTA", "30"))
+ORQUESTRADOR_MAX_PASSOS = int(os.getenv("ORQUESTRADOR_MAX_PASSOS", "6"))
+
+INSTRUCOES = (
+    "Você é o orquestrador do Brain Zap e responde em português usando as ferramentas "
+    "disponíveis (finanças, agenda, trabalho e pesquisa). Quando o pedido precisar de várias "
+    "informações independentes, chame todas as ferramentas necessárias de uma vez, na mesma "
+    "resposta. Depois de receber os resultados, responda ao usuário de forma direta."
+)
+
+
+# Nome da ferramenta no formato aceito pelas APIs de function calling (^[a-zA-Z0-9_-]+$)
+def nome_funcao(nome: str) -> str:
+    sem_acentos = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-zA-Z0-9_-]+", "_", sem_acentos).strip("_")[:64]
+
+
+class OrquestradorParalelo:
+    def __init__(self, llm, ferramentas: list, trabalhadores: int = ORQUESTRADOR_TRABALHADORES,
+                 timeout_ferramenta: float = ORQUESTRADOR_TIMEOUT_FERRAMENTA, timeouts: dict = None,
+                 max_passos: int = ORQUESTRADOR_MAX_PASSOS, verbose: bool = False):
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        self.ferramentas = {}
+        esquemas = []
+        for ferramenta in ferramentas:
+            nome = nome_funcao(ferramenta.name)
+            self.ferramentas[nome] = ferramenta
+            esquema = convert_to_openai_tool(ferramenta)
+            esquema["function"]["name"] = nome
+            esquemas.append(esquema)
+
+        try:
+            self.modelo = llm.bind_tools(esquemas)
+        except NotImplementedError:
+            self.modelo = llm
+        self.timeout_ferramenta = timeout_ferramenta
+        self.timeouts = {nome_funcao(nome): valor for nome, valor in (timeouts or {}).items()}
+        self.max_passos = max_passos
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="ferramenta")
+
+    def run(self, pergunta: str, callbacks: list = None) -> str:
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        config = {"callbacks": callbacks} if callbacks else {}
+        mensagens = [SystemMessage(content=INSTRUCOES), HumanMessage(content=pergunta)]
+        for _ in range(self.max_passos):
+            resposta = self.modelo.invoke(mensagens, config=config)
+            mensagens.append(resposta)
+            if not resposta.tool_calls:
+                return resposta.content
+            mensagens.extend(self.executar_chamadas(resposta.tool_calls, config))
+        return "Não foi possível concluir o pedido dentro do limite de passos."
+
+    # Executa as chamadas de um passo ao mesmo tempo e retorna um ToolMessage para cada
+    # uma, na ordem em que foram pedidas. O tempo máximo de cada chamada conta a partir do
+    # momento em que ela começa a rodar; enquanto espera na fila por uma thread livre ela
+    # aguarda no máximo esse mesmo tempo e, se não começar, é cancelada. Uma ferramenta que
+    # estoura o tempo não é interrompida (threads não podem ser paradas): a resposta segue
+    # sem ela, mas a função continua rodando e ocupando uma thread do pool até terminar.
+    def executar_chamadas(self, chamadas: list, config: dict = None) -> list:
+        from langchain_core.messages import ToolMessage
+
+        enviadas = []
+        for chamada in chamadas:
+            ferramenta = self.ferramentas.get(chamada["name"])
+            if ferramenta is None:
+                enviadas.append((chamada, None, None, 0))
+                continue
+            limite = self.timeouts.get(chamada["name"], self.timeout_ferramenta)
+            inicio = _Inicio()
+            futuro = self._pool.submit(inicio.executar, ferramenta.invoke, chamada["args"], config or {})
+            enviadas.append((chamada, futuro, inicio, limite))
+
+        mensagens = []
+        for chamada, futuro, inicio, limite in enviadas:
+            if futuro is None:
+                conteudo = f"Ferramenta '{chamada['name']}' não existe."
+            else:
+                try:
+                    conteudo = str(inicio.aguardar(futuro, limite))
+                except TempoEsgotado:
+                    futuro.cancel()  # só tem efeito se a chamada ainda estiver na fila
+                    conteudo = f"Tempo esgotado na ferramenta '{chamada['name']}'."
+                except Exception as e:
+                    conteudo = f"Erro na ferramenta '{chamada['name']}': {e}"
+            if self.verbose:
+                print(f"[{chamada['name']}] {chamada['args']} -> {conteudo}")
+            mensagens.append(ToolMessage(content=conteudo, tool_call_id=chamada["id"], name=chamada["name"]))
+        return mensagens
+
+    def fechar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Marca o momento em que uma chamada sai da fila do pool e começa a rodar
+class _Inicio:
+    def __init__(self):
+        self.enviada = time.monotonic()
+        self.momento = None
+        self._iniciada = threading.Event()
+
+    def executar(self, funcao, *args):
+        self.momento = time.monotonic()
+        self._iniciada.set()
+        return funcao(*args)
+
+    # Resultado da chamada, com o limite contado a partir do início da execução
+    def aguardar(self, futuro, limite: float):
+        if not self._iniciada.wait(max(0.0, self.enviada + limite - time.monotonic())):
+            raise TempoEsgotado()
+        return futuro.result(timeout=max(0.0, self.momento + limite - time.monotonic()))
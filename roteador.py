@@ -0,0 +1,215 @@
+import re
+import time
+import threading
+import unicodedata
+from collections import namedtuple, Counter
+from agents.extratos import converter_valor
+from agents.registro import carregar, ferramentas
+from config import instrumentacao
+
+# Roteador determinístico na frente do orquestrador.
+# Pedidos com formato conhecido ("saldo mensal", "registre gasto de 50 em Alimentação")
+# são reconhecidos por expressões regulares e executados direto na função do subagente,
+# sem passar pelo LLM. O que não casar com nenhuma regra vai para o orquestrador
+# (ou para o fallback informado, ex.: um agente com LLM falso em testes).
+#
+# As regras são aplicadas ao texto sem acentos e em minúsculas; os argumentos de texto
+# (categoria, descrição, evento) são recortados do texto original, mantendo os acentos.
+
+Regra = namedtuple("Regra", ["nome", "padrao", "alvo", "argumentos"])
+
+PERIODOS = {
+    "semana": "semanal", "semanal": "semanal",
+    "quinzena": "quinzenal", "quinzenal": "quinzenal",
+    "mes": "mensal", "mensal": "mensal",
+    "trimestre": "trimestral", "trimestral": "trimestral",
+}
+
+_PERIODO = r"(?:\s+(?:d[oa]\s+|de\s+|n[oa]\s+|ultim[oa]\s+)*(?P<periodo>semanal|semana|quinzenal|quinzena|mensal|mes|trimestral|trimestre))?"
+_FIM = r"\s*[?.!]?\s*$"
+_VALOR = r"(?:r\$\s*)?(?P<valor>\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?)(?:\s+reais)?"
+# Categoria e sub-categoria: uma palavra ("Alimentação", "Pet-shop") ou uma frase entre aspas
+_NOME = r'(?:"[^"]+"|[^\W\d_]+(?:-[^\W\d_]+)*)'
+# Datas, números e dias na descrição mudam o lançamento; esses pedidos vão para o orquestrador
+_SEM_DATA = r"(?!.*(?:\d|\b(?:anteontem|ontem|hoje|amanha|dia)\b))"
+
+
+def _sem_acentos(texto: str) -> str:
+    # Troca cada caractere pela sua letra base, mantendo o tamanho do texto
+    return "".join(unicodedata.normalize("NFKD", caractere)[0] for caractere in texto).lower()
+
+
+def _periodo(match, texto: str) -> tuple:
+    return (PERIODOS.get(match.group("periodo"), "mensal"),), {}
+
+
+def _recorte(match, texto: str, grupo: str) -> str:
+    if match.group(grupo) is None:
+        return ""
+    return texto[match.start(grupo):match.end(grupo)].strip()
+
+
+# "1.500,00" e "1.500" usam o ponto como separador de milhar; "50.5" e "50,5" são decimais
+# (a mesma regra da importação de extratos)
+def _valor(match) -> float:
+    return float(converter_valor(match.group("valor")))
+
+
+def _nome(match, texto: str, grupo: str) -> str:
+    return _recorte(match, texto, grupo).strip('"').strip()
+
+
+def _gasto(match, texto: str) -> tuple:
+    return (_valor(match), _nome(match, texto, "categoria")), {
+        "sub_categoria": _nome(match, texto, "sub_categoria"),
+        "descricao": _recorte(match, texto, "descricao"),
+    }
+
+
+def _receita(match, texto: str) -> tuple:
+    return (_valor(match),), {}
+
+
+def _evento(match, texto: str) -> tuple:
+    return (_recorte(match, texto, "evento"),), {}
+
+
+def _sem_argumentos(match, texto: str) -> tuple:
+    return (texto,), {}
+
+
+REGRAS = [
+    Regra(
+        "saldo",
+        re.compile(r"^(?:qual\s+(?:e|eh)\s+)?(?:o\s+)?(?:meu\s+)?saldo(?:\s+disponivel)?" + _PERIODO + _FIM),
+        "agents.financeiro:saldo_disponivel", _periodo,
+    ),
+    Regra(
+        "relatorio",
+        re.compile(r"^(?:(?:mostre|mostrar|gere|gerar|ver)\s+)?(?:o\s+)?(?:meu\s+)?relatorio(?:\s+de\s+gastos)?" + _PERIODO + _FIM),
+        "agents.financeiro:relatorio_gastos", _periodo,
+    ),
+    Regra(
+        "resumo",
+        re.compile(r"^(?:(?:mostre|mostrar|ver)\s+)?(?:o\s+)?(?:meu\s+)?resumo(?:\s+de|\s+dos)?\s+gastos" + _PERIODO + _FIM),
+        "agents.financeiro:resumo_gastos", _periodo,
+    ),
+    Regra(
+        "orcamentos",
+        re.compile(r"^(?:verifi(?:car|que)\s+(?:os\s+|meus\s+)?orcamentos|orcamentos\s+(?:ultrapassados|estourados|excedidos))" + _PERIODO + _FIM),
+        "agents.financeiro:verificar_orcamentos", _periodo,
+    ),
+    Regra(
+        "economia",
+        re.compile(r"^(?:onde\s+(?:posso\s+)?economizar|sugir(?:a|ir)\s+(?:uma\s+)?reducao(?:\s+de\s+gastos)?)" + _PERIODO + _FIM),
+        "agents.financeiro:sugerir_reducao_gastos", _periodo,
+    ),
+    Regra(
+        "registrar_gasto",
+        re.compile(
+            r"^(?:registr(?:e|ar)|adicion(?:e|ar)|anot(?:e|ar)|lanc(?:e|ar))\s+(?:um\s+|o\s+)?gasto\s+de\s+" + _VALOR
+            + r"\s+(?:em|na|no|com)\s+(?P<categoria>" + _NOME + r")(?:\s*/\s*(?P<sub_categoria>" + _NOME + r"))?"
+            + r"(?:\s*[,;:]\s*" + _SEM_DATA + r"(?P<descricao>.+?))?" + _FIM
+        ),
+        "agents.financeiro:registrar_gasto", _gasto,
+    ),
+    Regra(
+        "registrar_receita",
+        re.compile(r"^(?:registr(?:e|ar)|adicion(?:e|ar)|anot(?:e|ar)|lanc(?:e|ar))\s+(?:uma\s+|a\s+)?receita\s+de\s+" + _VALOR + _FIM),
+        "agents.financeiro:registrar_receita", _receita,
+    ),
+    Regra(
+        "adicionar_evento",
+        re.compile(r"^(?:adicion(?:e|ar)|cri(?:e|ar)|agend(?:e|ar))\s+(?:um\s+)?(?:evento|compromisso)(?:\s+na\s+(?:minha\s+)?agenda)?\s*:\s*(?P<evento>.+?)" + _FIM),
+        "agents.agenda:adicionar_evento", _evento,
+    ),
+    Regra(
+        "listar_eventos",
+        re.compile(r"^(?:(?:liste|listar|mostre|mostrar|ver)\s+)?(?:os\s+|meus\s+)?(?:proximos\s+eventos|eventos|compromissos|minha\s+agenda)" + _FIM),
+        "agents.agenda:listar_eventos", _sem_argumentos,
+    ),
+]
+
+
+def _orquestrador(texto: str) -> str:
+    from main import obter_orquestrador
+    return obter_orquestrador().run(texto, callbacks=instrumentacao.callbacks())
+
+
+# Nome da ferramenta registrada com este alvo (o mesmo que o orquestrador informa nas métricas)
+def _nome_ferramenta(alvo: str) -> str:
+    return next((ferramenta.nome for ferramenta in ferramentas() if ferramenta.alvo == alvo), alvo)
+
+
+class Roteador:
+    def __init__(self, regras: list = None, fallback=None):
+        self.regras = REGRAS if regras is None else regras
+        self.fallback = _orquestrador if fallback is None else fallback
+        self._contagem = Counter()
+        self._lock = threading.Lock()
+
+    # Retorna (regra, args, kwargs) da primeira regra que casar com o texto, ou None
+    def rotear(self, texto: str):
+        texto = " ".join(texto.split())
+        normalizado = _sem_acentos(texto)
+        for regra in self.regras:
+            match = regra.padrao.match(normalizado)
+            if match:
+                args, kwargs = regra.argumentos(match, texto)
+                return regra, args, kwargs
+        return None
+
+    def responder(self, texto: str) -> str:
+        rota = self.rotear(texto)
+        if rota is None:
+            self._contar("fallback")
+            return self.fallback(texto)
+        regra, args, kwargs = rota
+        self._contar("roteadas", regra.nome)
+        funcao = carregar(regra.alvo)
+        if not instrumentacao.ativa():
+            return funcao(*args, **kwargs)
+        inicio, erro = time.perf_counter(), False
+        try:
+            return funcao(*args, **kwargs)
+        except Exception:
+            erro = True
+            raise
+        finally:
+            instrumentacao.registrar_ferramenta(_nome_ferramenta(regra.alvo), time.perf_counter() - inicio, erro)
+
+    def _contar(self, tipo: str, regra: str = None):
+        with self._lock:
+            self._contagem[tipo] += 1
+            if regra:
+                self._contagem[f"regra:{regra}"] += 1
+
+    # Quantos pedidos foram roteados direto e quantos foram para o orquestrador
+    def estatisticas(self) -> dict:
+        with self._lock:
+            contagem = dict(self._contagem)
+        roteadas, fallback = contagem.pop("roteadas", 0), contagem.pop("fallback", 0)
+        total = roteadas + fallback
+        return {
+            "roteadas": roteadas,
+            "fallback": fallback,
+            "taxa_roteamento": roteadas / total if total else 0.0,
+            "por_regra": {chave.split(":", 1)[1]: valor for chave, valor in contagem.items()},
+        }
+
+
+_roteador = None
+_roteador_lock = threading.Lock()
+
+
+def obter_roteador() -> Roteador:
+    global _roteador
+    if _roteador is None:
+        with _roteador_lock:
+            if _roteador is None:
+                _roteador = Roteador()
+    return _roteador
+
+
+def responder(texto: str) -> str:
+    return obter_roteador().responder(texto)
@@ -0,0 +1,33 @@
+import unittest
+from decimal import Decimal
+from agents.extratos import converter_valor
+
+# Testes offline da leitura de extratos: só convertem o texto, sem acessar o banco de dados.
+#
+#   python -m pytest test_extratos.py   (ou python -m unittest test_extratos)
+
+
+class TestConverterValor(unittest.TestCase):
+    def test_milhar_sem_centavos(self):
+        self.assertEqual(converter_valor("1.500"), Decimal("1500"))
+        self.assertEqual(converter_valor("-12.345.678"), Decimal("-12345678"))
+
+    def test_milhar_com_centavos(self):
+        self.assertEqual(converter_valor("R$ 1.234,56"), Decimal("1234.56"))
+        self.assertEqual(converter_valor("-1.500,00"), Decimal("-1500.00"))
+
+    def test_ponto_decimal(self):
+        self.assertEqual(converter_valor("50.5"), Decimal("50.5"))
+        self.assertEqual(converter_valor("-1234.56"), Decimal("-1234.56"))
+        self.assertEqual(converter_valor("1.5000"), Decimal("1.5000"))
+
+    def test_virgula_decimal(self):
+        self.assertEqual(converter_valor("50,5"), Decimal("50.5"))
+
+    def test_valor_invalido(self):
+        with self.assertRaises(ValueError):
+            converter_valor("abc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from roteador import Roteador
+
+# Testes offline do roteador: só reconhecem o pedido e extraem os argumentos, sem
+# executar a ferramenta nem acessar o banco de dados.
+#
+#   python -m pytest test_roteador.py   (ou python -m unittest test_roteador)
+
+
+class TestValores(unittest.TestCase):
+    def setUp(self):
+        self.roteador = Roteador(fallback=lambda texto: texto)
+
+    def _gasto(self, valor: str) -> float:
+        regra, args, kwargs = self.roteador.rotear(f"registre gasto de {valor} em Aluguel")
+        self.assertEqual(regra.nome, "registrar_gasto")
+        self.assertEqual(args[1], "Aluguel")
+        return args[0]
+
+    def test_milhar_sem_virgula(self):
+        self.assertEqual(self._gasto("1.500"), 1500.0)
+
+    def test_milhar_com_centavos(self):
+        self.assertEqual(self._gasto("1.500,00"), 1500.0)
+
+    def test_ponto_decimal(self):
+        self.assertEqual(self._gasto("50.5"), 50.5)
+
+    def test_virgula_decimal(self):
+        self.assertEqual(self._gasto("50,5"), 50.5)
+
+    def test_receita_com_milhar(self):
+        regra, args, _ = self.roteador.rotear("registre receita de 2.000")
+        self.assertEqual(regra.nome, "registrar_receita")
+        self.assertEqual(args[0], 2000.0)
+
+
+class TestCategorias(unittest.TestCase):
+    def setUp(self):
+        self.roteador = Roteador(fallback=lambda texto: texto)
+
+    def test_categoria_sub_categoria_e_descricao(self):
+        regra, args, kwargs = self.roteador.rotear("registre gasto de 50 em Alimentação / Restaurantes: jantar com amigos")
+        self.assertEqual(regra.nome, "registrar_gasto")
+        self.assertEqual(args, (50.0, "Alimentação"))
+        self.assertEqual(kwargs, {"sub_categoria": "Restaurantes", "descricao": "jantar com amigos"})
+
+    def test_categoria_entre_aspas(self):
+        _, args, kwargs = self.roteador.rotear('registre gasto de 120 em "Plano de saúde"/"Consulta médica"')
+        self.assertEqual(args[1], "Plano de saúde")
+        self.assertEqual(kwargs["sub_categoria"], "Consulta médica")
+
+    def test_data_depois_da_categoria_vai_para_o_agente(self):
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Alimentação no dia 10/10"))
+
+    def test_dia_relativo_depois_da_categoria_vai_para_o_agente(self):
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Alimentação ontem"))
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Alimentação hoje"))
+
+    def test_numero_depois_da_categoria_vai_para_o_agente(self):
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Mercado 2"))
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Mercado/Feira 10/10"))
+
+    def test_data_na_descricao_vai_para_o_agente(self):
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Mercado: compras de ontem"))
+        self.assertIsNone(self.roteador.rotear("registre gasto de 50 em Mercado: compras do dia 10"))
+
+    def test_texto_nao_roteado_usa_o_fallback(self):
+        texto = "registre gasto de 50 em Alimentação ontem"
+        self.assertEqual(self.roteador.responder(texto), texto)
+
+
+if __name__ == "__main__":
+    unittest.main()